@@ -11,6 +11,8 @@ import random
 import threading
 import time
 
+from .bot_scheduler import MoveScheduler
+from .bot_speculation import Speculator
 from .client import generals
 from .client.constants import *
 from .viewer import GeneralsViewer
@@ -18,7 +20,7 @@ from .viewer import GeneralsViewer
 
 class GeneralsBot(object):
     def __init__(self, move_method, move_event=None, name="PurdueBot", game_type="private", private_room_id=None,
-                 show_game_viewer=True, public_server=False, start_msg_cmd=""):
+                 show_game_viewer=True, public_server=False, start_msg_cmd="", speculate=False):
         # Save Config
         self._move_method = move_method
         self._name = name
@@ -30,6 +32,8 @@ class GeneralsBot(object):
         # ----- Start Game -----
         self._running = True
         self._move_event = threading.Event()
+        self._scheduler = MoveScheduler()
+        self._speculator = Speculator(move_method) if speculate else None
         _create_thread(self._start_game_thread)
         _create_thread(self._start_chat_thread)
         _create_thread(self._start_moves_thread)
@@ -68,6 +72,9 @@ class GeneralsBot(object):
 
     def _set_update(self, game_map):
         self._map = game_map
+        if self._scheduler.turn == 0:  # First update: start from the interval of the speed the game was set to
+            self._scheduler.set_game_speed(self._game.game_speed)
+        self._scheduler.turn_started(game_map.turn)
         self_dir = dir(self)
 
         # Update GeneralsViewer Grid
@@ -81,6 +88,10 @@ class GeneralsBot(object):
             logging.info("!!!! Game Complete. Result = " + str(game_map.result) + " !!!!")
             if '_moves_realized' in self_dir:
                 logging.info("Moves: %d, Realized: %d" % (self._map.turn, self._moves_realized))
+            logging.info("Deadline misses: %s" % self._scheduler.report())
+            if self._speculator is not None:
+                logging.info("Speculative moves: %d placed, %d recomputed, %d abandoned" % (
+                    self._speculator.hits, self._speculator.misses, self._speculator.preempted))
             _create_thread(self._exit_game)
         self._has_completed = game_map.complete
 
@@ -97,12 +108,35 @@ class GeneralsBot(object):
         self._moves_realized = 0
         while self._running:
             self._move_event.wait()
-            self._make_move()
             self._move_event.clear()
+            if self._speculator is None or not self._speculator.commit(self, self._map):
+                self._make_move()
+            if self._speculator is not None and not self._map.complete:
+                self._speculate()
             self._moves_realized += 1
 
     def _make_move(self):
-        self._move_method(self, self._map)
+        self._scheduler.run_routine(self._move_method.__name__, lambda: self._move_method(self, self._map))
+
+    def _speculate(self):
+        # Compute the next turn's move against the board predicted after the move the server executes next
+        if self._move_event.is_set():  # The next update is already here
+            return
+        shadow, queued = self._game.snapshot()
+        moves = [(move.source, move.dest, move.move_half) for move in queued[:1]]
+        try:
+            self._speculator.speculate(shadow, moves, self._scheduler.turn_interval, queued[1:], self._move_event)
+        except Exception:
+            logging.exception("Speculative move failed, disabling speculation")
+            self._speculator = None
+
+    def run_routines(self, routines):
+        """
+        Run move routines in priority order against this turn's deadline (see MoveScheduler.run)
+        :param routines: List of (name, routine), where each routine returns or yields (source, dest)
+        :return: (source, dest) of the move to place, or (False, False)
+        """
+        return self._scheduler.run(routines)
 
     # ======================== Chat Messages ======================== #
 
@@ -124,25 +158,24 @@ class GeneralsBot(object):
     def place_move(self, source, dest, move_half=False):
         if self._map.is_valid_position(dest.x, dest.y):
             self._game.move(source.y, source.x, dest.y, dest.x, move_half)
-            if SHOULD_DIRTY_MAP_ON_MOVE:
-                self._update_map_dirty(source, dest, move_half)
             return True
         return False
 
-    def _update_map_dirty(self, source, dest, move_half):
-        army = source.army if not move_half else source.army / 2
-        source.update(self._map, source.tile, 1)
-
-        if dest.is_on_team():  # Moved Internal Tile
-            dest_army = army - 1 + dest.army
-            dest.update(self._map, source.tile, dest_army, is_dirty=True)
-            return True
-
-        elif army > dest.army + 1:  # Captured Tile
-            dest_army = army - 1 - dest.army
-            dest.update(self._map, source.tile, dest_army, is_city=dest.is_general, is_dirty=True)
-            return True
-        return False
+    def place_moves(self, moves, move_half=False, replace=True):
+        """
+        Queue several moves at once (ex: a path segment), to be executed one per turn. The move method is still
+        called every turn while they are queued (see queued_moves and bot_moves.interrupt_queued_moves).
+        :param moves: List of (source, dest)
+        :param replace: if True, drop the moves already queued first
+        :return: Number of moves queued
+        """
+        if replace and self._game.queued_moves:
+            self._game.clear_moves()
+        for i, (source, dest) in enumerate(moves):
+            if not self._map.is_valid_position(dest.x, dest.y):
+                return i
+            self._game.move(source.y, source.x, dest.y, dest.x, move_half, single=False)
+        return len(moves)
 
     # ======================== Properties ======================== #
 
@@ -150,6 +183,14 @@ class GeneralsBot(object):
     def neighbors(self):
         return self._neighbors
 
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+    @property
+    def queued_moves(self):
+        return self._game.queued_moves
+
 # ======================== Global Helpers ======================== #
 
 def _create_thread(f):
@@ -12,29 +12,24 @@ from .client.constants import *
 
 # ======================== Move Priority Capture ======================== #
 from .client.map import Map
+from .client.search import finish
 
 
 def move_priority(game_map):
     priority_move = (False, False)
-    generals = [t for t in game_map.generals if t is not None]
-    generals_and_cities = generals + game_map.cities
-
-    for tile in generals_and_cities:
-        # if it doesn't belong to my teammates and isn't dirty
-        if tile.should_attack():
-            for neighbor in tile.neighbors():
-                # if I can capture this tile
-                if neighbor.is_self() and neighbor.army > max(1, tile.army + 1):
-                    # if I haven't already found a priority move OR I have, but it uses a weaker army
-                    if not priority_move[0] or priority_move[0].army < neighbor.army:
-                        priority_move = (neighbor, tile)
-                    # if the tile is a general, capture it
-                    if tile in generals:
-                        priority_move = (neighbor, tile)
-            # if priority_move[0]:
-            #     # TODO: Note, priority moves are repeatedly sent, indicating move making is sending repeated moves
-            #     # logging.info("Priority Move from %s -> %s" % (priority_move[0], priority_move[1]))
-            #     break
+
+    # (source, target) pairs where my tile could capture a neighboring general or city, generals first
+    for source, target, margin in game_map.capture_table.pairs():
+        if target.is_dirty():
+            continue
+        # if I haven't already found a priority move OR I have, but it uses a weaker army
+        if not priority_move[0] or priority_move[0].army < source.army:
+            priority_move = (source, target)
+        # if the tile is a general, capture it
+        if target in game_map.generals:
+            priority_move = (source, target)
+    # Repeats of a priority move still queued on the server are not sent again, see MoveCoalescer
+    # logging.info("Priority Move from %s -> %s" % (priority_move[0], priority_move[1]))
     return priority_move
 
 
@@ -47,12 +42,16 @@ def move_outward(game_map, path=None):
     :param path:
     :return:
     """
-    if path is None:
-        path = []
+    path = set(path) if path else set()
     swamp_moves = []
     # move_swamp = (False, False)
 
-    for source in game_map.tiles[game_map.player_index]:  # Check Each Owned Tile
+    # Interior tiles have nothing to attack, but may still move into the path
+    sources = set(game_map.border.tiles())
+    for tile in path:
+        sources.update(neighbor for neighbor in tile.neighbors(include_swamps=True) if neighbor.is_self())
+
+    for source in sorted(sources, key=lambda tile: tile.tile_id):  # Check Each Owned Tile That Can Move Out
         if source.army >= 2 and source not in path:  # Find One With Armies
             target = source.neighbor_to_attack(path)
             if target:
@@ -88,6 +87,29 @@ def move_path(path):
     return move_capture
 
 
+def path_moves(path, start=0):
+    """
+    Moves carrying the army on path[start] along path, for as long as it can capture each tile on the way
+    :return: List of (source, dest)
+    """
+    moves = []
+    if start >= len(path):
+        return moves
+    owner = path[start].tile
+    carried = path[start].army - 1  # Armies that leave the current tile
+    for source, dest in zip(path[start:], path[start + 1:]):
+        if carried < 1:
+            break
+        if dest.tile == owner:
+            carried += dest.army - 1
+        elif carried > dest.army:
+            carried -= dest.army + 1
+        else:
+            break
+        moves.append((source, dest))
+    return moves
+
+
 def _move_path_largest(path):
     largest = path[0]
     largest_index = 0
@@ -129,10 +151,7 @@ def should_move_half(game_map, source, dest=None):
             return random.choice([True, True, True, False])
         elif source.is_city:
             ## if game_map.turn - source.turn_captured < 16:
-            enemy_neighbors = sum(
-                1 for neighbor in source.neighbors(include_cities=True, include_swamps=True)
-                if neighbor.is_enemy()
-            )
+            enemy_neighbors = game_map.capture_table.enemy_neighbors(source)
             enemy_neighbors -= dest.is_enemy()  # if one of the surrounding enemy tiles is the dest, then it doesn't count.
             if enemy_neighbors > 0:  # If we don't own all the surrounding land except the destination, move half
                 return True
@@ -146,6 +165,13 @@ def should_move_half(game_map, source, dest=None):
 
 # noinspection SpellCheckingInspection
 def path_proximity_target(game_map):
+    return finish(path_proximity_target_steps(game_map))
+
+
+def path_proximity_target_steps(game_map):
+    """
+    path_proximity_target for anytime routines: yields None while searching, and returns the path
+    """
     # Find path from largest tile to closest targetbasic_config
 
     # find the tile I own with the most armies. Include generals at .5 of their actual armies
@@ -153,26 +179,64 @@ def path_proximity_target(game_map):
     # find the best enemy target to attack. If all enemy tiles have more that 4x+14 army, where x
     # is the size of my largest army, then return none.
     target = source.nearest_target_tile()
-    path = source.path_to(target, include_cities=True)
+    path = yield from source.path_to_steps(target, include_cities=True)
     # logging.info("Proximity %s -> %s via %s" % (source, target, path))
 
     if not game_map.can_step_path(path):
-        path = path_gather(game_map)
+        path = yield from path_gather_steps(game_map)
         # logging.info("Proximity FAILED, using path %s" % path)
     return path
 
 
 # noinspection SpellCheckingInspection,SpellCheckingInspection
 def path_gather(game_map, elso_do=None):
+    return finish(path_gather_steps(game_map, elso_do))
+
+
+def path_gather_steps(game_map, elso_do=None):
+    """
+    path_gather for anytime routines: yields None while searching, and returns the path
+    """
     if elso_do is None:
         elso_do = []
     target = game_map.find_largest_tile()
     source = game_map.find_largest_tile(tiles_to_exclude=[target], include_general=0.5)
     if source and target and source != target:
-        return source.path_to(target)
+        largest = yield from game_map.flow.largest_steps()
+        path = largest.path(source)
+        if path and path[-1] == target and all(tile.is_self() for tile in path):  # Gather within my territory
+            return path
+        return (yield from source.path_to_steps(target))
     return elso_do
 
 
+# ======================== Queued Moves ======================== #
+
+def urgent_routines(game_map):
+    """
+    :return: List of (name, routine) worth interrupting queued moves for: leaving a swamp, and capturing a city or
+        general with an adjacent larger force
+    """
+    return [
+        ("leave_swamp", lambda: leave_swamp(game_map)),
+        ("move_priority", lambda: move_priority(game_map)),
+    ]
+
+
+def interrupt_queued_moves(bot, game_map):
+    """
+    Called first thing by a move method. While moves are queued (ex: a path segment) only the urgent routines run,
+    and a move they find replaces the queued moves.
+    :return: True if moves were queued, in which case the move method should place no other move this turn
+    """
+    if not bot.queued_moves:
+        return False
+    (source, dest) = bot.run_routines(urgent_routines(game_map))
+    if source and dest:
+        bot.place_moves([(source, dest)], move_half=should_move_half(game_map, source, dest), replace=True)
+    return True
+
+
 # ======================== Moves added by Marla ======================== #
 
 def leave_swamp(game_map: Map):
@@ -191,7 +255,7 @@ def move_explore(game_map: Map):
         return False, False
 
     source, dest = target.step_toward_me()
-    print("Exploration targeting %s. First step: %s -> %s" %(target, source, dest))
+    logging.debug("Exploration targeting %s. First step: %s -> %s" % (target, source, dest))
 
     return source, dest
 
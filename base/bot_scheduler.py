@@ -0,0 +1,107 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Generals Bot: Deadline-aware Move Scheduling
+"""
+
+import logging
+import time
+import types
+
+from .client.constants import *
+
+NO_MOVE = (False, False)
+
+
+class MoveScheduler(object):
+    """
+    Knows how long a turn lasts and when the move for the current turn has to be sent, and runs move routines
+    against that deadline.
+
+    A routine is a callable taking no arguments. It returns a move ((source, dest), or (False, False) for no
+    move), or is a generator yielding better and better moves (an anytime computation): the last move yielded is
+    kept, and the generator is closed once the deadline is reached.
+
+    With use_deadline False there is no deadline (ex: replaying a game offline, where updates arrive back to
+    back): every routine runs to completion, so the moves made do not depend on timing.
+    """
+    def __init__(self, turn_interval=TURN_INTERVAL, use_deadline=True):
+        self.use_deadline = use_deadline
+        self.turn_interval = turn_interval  # Seconds per turn, estimated from the arrival times of updates
+        self.turn = 0
+        self.turn_start = time.perf_counter()
+        self.misses = {}  # Routine name -> number of turns it was still running at the deadline
+        self.runs = {}  # Routine name -> number of turns it ran
+        self._last_update = None  # (turn, arrival time) of the previous update
+
+    def set_game_speed(self, speed):
+        self.turn_interval = TURN_INTERVAL / int(speed)
+
+    def turn_started(self, turn, now=None):
+        """
+        Called when the update for turn arrives
+        """
+        now = time.perf_counter() if now is None else now
+        if self._last_update is not None and turn > self._last_update[0]:
+            measured = (now - self._last_update[1]) / (turn - self._last_update[0])
+            self.turn_interval += (measured - self.turn_interval) * TURN_INTERVAL_SMOOTHING
+        self._last_update = (turn, now)
+        self.turn = turn
+        self.turn_start = now
+
+    @property
+    def deadline(self):
+        return self.turn_start + self.turn_interval * MOVE_DEADLINE_FRACTION
+
+    def time_left(self):
+        if not self.use_deadline:
+            return float('inf')
+        return self.deadline - time.perf_counter()
+
+    # ======================== Running Routines ======================== #
+
+    def run(self, routines):
+        """
+        Run routines in priority order until one finds a move. Once the deadline has passed only the last routine
+        (the cheap fallback) is still started, so the turn is not lost, and a routine cut off at the deadline still
+        gives the best move it had found.
+        :param routines: List of (name, routine)
+        :return: (source, dest) of the move to send, or (False, False)
+        """
+        last = len(routines) - 1
+        for i, (name, routine) in enumerate(routines):
+            if i < last and self.time_left() <= 0:
+                logging.debug("Turn %d: deadline reached, skipping %s" % (self.turn, name))
+                continue
+            move = self.run_routine(name, routine)
+            if move[0] and move[1]:
+                return move
+        return NO_MOVE
+
+    def run_routine(self, name, routine):
+        """
+        Run a single routine, recording a miss against name if it is still running at the deadline
+        :return: (source, dest) of the best move the routine found, or (False, False)
+        """
+        self.runs[name] = self.runs.get(name, 0) + 1
+        best = NO_MOVE
+        result = routine()
+        if isinstance(result, types.GeneratorType):
+            for move in result:
+                if move and move[0] and move[1]:
+                    best = move
+                if self.time_left() <= 0:
+                    result.close()
+                    break
+        elif result and result[0] and result[1]:
+            best = result
+
+        if self.time_left() <= 0:
+            self.misses[name] = self.misses.get(name, 0) + 1
+            logging.debug("Turn %d: %s missed the deadline by %.1f ms" % (self.turn, name, -1000 * self.time_left()))
+        return best
+
+    def report(self):
+        """
+        :return: String listing the deadline misses of each routine
+        """
+        return ", ".join("%s: %d/%d" % (name, self.misses.get(name, 0), runs) for name, runs in self.runs.items())
@@ -0,0 +1,277 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Generals Bot: Speculative next-turn move computation
+"""
+
+from array import array
+import logging
+import random
+import sys
+
+from .bot_scheduler import MoveScheduler
+from .client.constants import *
+from .client.tile import Tile
+
+
+class Speculator(object):
+    """
+    Computes the next turn's move before the next update arrives. Once this turn's move is sent, the live map is
+    cloned (Map.clone: fog memory, turn_held, cities and generals included), the next board is predicted from it
+    (the move the server will execute, city/general growth every other turn, swamp decay, and the global increment
+    every 50 turns) and applied to the clone, and the move method is run against the clone with moves recorded
+    instead of sent. When the real update arrives its board is compared with the prediction; if they match, the
+    clone went through the same update as the live map, and the recorded moves are placed on the live map without
+    running the move method.
+
+    Predictions fail whenever something I cannot predict changes (an opponent moves in sight, or a capture reveals
+    new tiles), so this pays off on quiet turns: gathering, and moving through my own territory. A speculative run
+    still going when the real update arrives is abandoned at the move method's next deadline check (see
+    MoveScheduler.run), so it delays the real move by at most one routine step.
+
+    The move method's module globals and the random module's state are restored after each speculative run, so a
+    discarded prediction leaves no trace in the bot's state; on a hit, the globals the run rebound (translated to
+    the live map) and the random state it left are applied instead, so the moves placed are the ones the move
+    method would have made. Globals have to be rebound to change (objects mutated in place are not copied). The
+    clone is dropped once its update arrives, and costs about as much memory as the live map until then.
+    """
+    def __init__(self, move_method, use_deadline=True):
+        self._move_method = move_method
+        self._use_deadline = use_deadline
+        self._shadow = None  # Clone of the live map the move method is run against, one turn ahead of it
+        self._prediction = None  # (turn, army_array, terrain_array, cities, generals) the shadow was brought to
+        self._moves = []  # Moves recorded for the predicted turn, see _RecordingBot
+        self._paths = ([], [])  # path and collect_path the move method left on the shadow
+        self._globals = {}  # Module globals the move method rebound on the shadow, see _run_isolated
+        self._random_state = None  # State of the random module after the speculative run
+        self.hits = 0
+        self.misses = 0
+        self.preempted = 0
+
+    def speculate(self, shadow, moves, turn_interval, queued_moves=(), preempt=None):
+        """
+        Predict the turn after shadow's and compute its move
+        :param shadow: Map.clone() of the live map, taken over by the speculation (see Generals.snapshot)
+        :param moves: List of (source tile id, dest tile id, move_half) the server will execute this turn
+        :param queued_moves: QueuedMoves still queued on the server after this turn
+        :param preempt: threading.Event set once the real update has arrived, which abandons the speculation
+        :return: True if a move was computed for the predicted board, False if the speculation was preempted
+        """
+        self._prediction = None
+        self._shadow = shadow
+        army, terrain = predict_arrays(shadow, moves)
+        turn = shadow.turn + 1
+        cities, generals = list(shadow._cities_private), list(shadow._generals_private)
+        board = [shadow.cols, shadow.rows] + army.tolist() + terrain.tolist()
+        shadow.update(_make_update_data(_board(shadow), board, shadow._cities_private, cities, generals,
+                                        shadow.scores, turn))
+        shadow.pending_moves.sync({move.move_id for move in queued_moves})  # As Generals does after an update
+
+        scheduler = _SpeculativeScheduler(turn_interval, self._use_deadline, preempt)
+        scheduler.turn_started(turn)
+        recorder = _RecordingBot(scheduler, queued_moves)
+        try:
+            scheduler.time_left()  # The update may have arrived while the shadow was brought forward
+            self._globals, self._random_state = self._run_isolated(recorder, shadow)
+        except _Preempted:
+            logging.debug("Turn %d: update arrived, speculative move abandoned" % turn)
+            self.preempted += 1
+            self._shadow = None
+            return False
+        self._moves = recorder.moves
+        self._paths = (shadow.path, shadow.collect_path)
+        self._prediction = (turn, army, terrain, cities, generals)
+        return True
+
+    def commit(self, bot, game_map):
+        """
+        Place the moves computed for game_map's turn, if the board matches the one they were computed against
+        :return: True if the moves were placed, False if the move method has to be run
+        """
+        prediction, self._prediction = self._prediction, None
+        shadow, self._shadow = self._shadow, None
+        if prediction is None:
+            return False
+        turn, army, terrain, cities, generals = prediction
+        if game_map.turn != turn or game_map.army_array != army or game_map.terrain_array != terrain or \
+                game_map._cities_private != cities or game_map._generals_private != generals:
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        grid = game_map.flat_grid
+        vars(sys.modules[self._move_method.__module__]).update(
+            {name: self._to_live(value, shadow, bot, game_map) for name, value in self._globals.items()})
+        random.setstate(self._random_state)
+        for moves, move_half, is_queue in self._moves:
+            tiles = [(grid[source], grid[dest]) for source, dest in moves]
+            if is_queue:
+                bot.place_moves(tiles, move_half=move_half)
+            else:
+                bot.place_move(tiles[0][0], tiles[0][1], move_half=move_half)
+        game_map.path = [grid[tile.tile_id] for tile in self._paths[0]]
+        game_map.collect_path = [grid[tile.tile_id] for tile in self._paths[1]]
+        logging.debug("Turn %d: placed speculative moves %s" % (turn, self._moves))
+        return True
+
+    def _run_isolated(self, recorder, shadow):
+        """
+        Run the move method against the shadow, then restore its module's globals and the random module's state
+        :return: (dict of the globals the run rebound and their values after it, random state after it)
+        """
+        state = vars(sys.modules[self._move_method.__module__])
+        saved = dict(state)
+        saved_random = random.getstate()
+        try:
+            self._move_method(recorder, shadow)
+        finally:
+            changed = {name: value for name, value in state.items() if name not in saved or saved[name] is not value}
+            for name in changed:
+                if name in saved:
+                    state[name] = saved[name]
+                else:
+                    del state[name]
+            random_state = random.getstate()
+            random.setstate(saved_random)
+        return changed, random_state
+
+    def _to_live(self, value, shadow, bot, game_map):
+        # Swap shadow objects left in a global for their live counterparts: Tiles (also in lists), the map, the bot
+        if isinstance(value, Tile):
+            return game_map.flat_grid[value.tile_id]
+        if isinstance(value, list):
+            return [self._to_live(item, shadow, bot, game_map) for item in value]
+        if isinstance(value, tuple):
+            return tuple(self._to_live(item, shadow, bot, game_map) for item in value)
+        if value is shadow:
+            return game_map
+        if isinstance(value, _RecordingBot):
+            return bot
+        return value
+
+
+class _Preempted(Exception):
+    pass
+
+
+class _SpeculativeScheduler(MoveScheduler):
+    """
+    MoveScheduler of a speculative run: once preempt is set (the real update arrived) every deadline check raises
+    _Preempted, which abandons the move method at its next checkpoint
+    """
+    def __init__(self, turn_interval, use_deadline=True, preempt=None):
+        MoveScheduler.__init__(self, turn_interval, use_deadline)
+        self._preempt = preempt
+
+    def time_left(self):
+        if self._preempt is not None and self._preempt.is_set():
+            raise _Preempted()
+        return MoveScheduler.time_left(self)
+
+
+class _RecordingBot(object):
+    """
+    Stands in for GeneralsBot while the move method runs against the shadow Map: moves are recorded as tile ids
+    instead of being sent
+    """
+    def __init__(self, scheduler, queued_moves=()):
+        self._scheduler = scheduler
+        self.queued_moves = tuple(queued_moves)
+        self.moves = []  # (List of (source tile id, dest tile id), move_half, queued with place_moves)
+
+    def place_move(self, source, dest, move_half=False):
+        self.moves.append(([(source.tile_id, dest.tile_id)], move_half, False))
+        return True
+
+    def place_moves(self, moves, move_half=False, replace=True):
+        self.moves.append(([(source.tile_id, dest.tile_id) for source, dest in moves], move_half, True))
+        return len(moves)
+
+    def run_routines(self, routines):
+        return self._scheduler.run(routines)
+
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+
+# ======================== Prediction ======================== #
+
+def predict_arrays(game_map, moves):
+    """
+    :param moves: List of (source tile id, dest tile id, move_half) executed this turn
+    :return: (army_array, terrain_array) expected in the next update, if nothing but moves and growth happens
+    """
+    army = array('i', game_map.army_array)
+    terrain = array('i', game_map.terrain_array)
+    for source, dest, move_half in moves:
+        owner = terrain[source]
+        if owner < 0 or army[source] < 2 or terrain[dest] in (TILE_MOUNTAIN, TILE_OBSTACLE):
+            continue
+        moving = army[source] // 2 if move_half else army[source] - 1
+        army[source] -= moving
+        if terrain[dest] == owner:
+            army[dest] += moving
+        elif moving > army[dest]:
+            army[dest] = moving - army[dest]
+            terrain[dest] = owner
+        else:
+            army[dest] -= moving
+
+    turn = game_map.turn + 1
+    if turn % 2 == 0:  # Cities and generals grow, swamps decay, once per full turn
+        for tile_id in range(len(army)):
+            if terrain[tile_id] < 0:
+                continue
+            if game_map.city_mask[tile_id] or game_map.general_mask[tile_id]:
+                army[tile_id] += 1
+            elif game_map.swamp_mask[tile_id]:
+                army[tile_id] -= 1
+                if army[tile_id] == 0:
+                    terrain[tile_id] = TILE_EMPTY
+    if turn % 50 == 0:  # Every 25 full turns every owned tile grows
+        for tile_id in range(len(army)):
+            if terrain[tile_id] >= 0 and not game_map.swamp_mask[tile_id]:
+                army[tile_id] += 1
+    return army, terrain
+
+
+def _board(game_map):
+    # The map array the server diffs: [cols, rows] followed by the army and terrain arrays
+    return [game_map.cols, game_map.rows] + game_map.army_array.tolist() + game_map.terrain_array.tolist()
+
+
+def _make_update_data(old_board, board, old_cities, cities, generals, scores, turn):
+    """
+    :param board: [cols, rows] followed by the army and terrain arrays (see _board)
+    :return: game_update data taking a Map from (old_board, old_cities) to (board, cities, generals)
+    """
+    return {
+        'turn': turn,
+        'map_diff': _make_diff(old_board, board),
+        'cities_diff': _make_diff(old_cities, cities),
+        'generals': generals,
+        'scores': scores,
+    }
+
+
+def _make_diff(old, new):
+    """
+    :return: diff (see map._apply_diff) that turns old into new
+    """
+    diff = []
+    a = 0
+    unchanged = 0
+    while a < len(new):
+        if a < len(old) and old[a] == new[a]:
+            unchanged += 1
+            a += 1
+            continue
+        start = a
+        while a < len(new) and not (a < len(old) and old[a] == new[a]):
+            a += 1
+        diff.extend((unchanged, a - start))
+        diff.extend(new[start:a])
+        unchanged = 0
+    if unchanged or len(old) > len(new):
+        diff.append(unchanged)
+    return diff
@@ -1,32 +1,76 @@
-from typing import List
+import heapq
 
 from .tile import Tile
 
 
-class TargetTracker(list):
+class TargetTracker(object):
     """
-    Track the targets that might be good to attack/explore
+    Track the targets that might be good to attack/explore.
+    Targets are kept in a heap ordered by score (lowest first), then by the turn they were added.
+    Pushing a tile again stamps it with a new version, and heap entries with an old version are skipped
+    when they reach the top, so nothing is ever searched for or removed from the middle of the heap.
     """
-    def __init__(self, *args, **kwargs):
-        list.__init__(self, *args, **kwargs)
+    def __init__(self):
+        self._heap = []  # (score, turn added, tile_id, version, Tile)
+        self._entries = {}  # tile_id -> (version, score, turn added) of the live entry
+        self._version = 0
         self.turn_last_updated: int = 0
 
-    def update_list(self, target_list: List[Tile], current_turn):
-        self.extend(target_list)
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, tile: Tile):
+        return tile.tile_id in self._entries
+
+    def copy(self, grid):
+        """
+        :param grid: flat_grid of the map the copy is for, whose Tiles replace this tracker's
+        """
+        tracker = TargetTracker()
+        tracker._heap = [(score, turn_added, tile_id, version, grid[tile_id])
+                         for score, turn_added, tile_id, version, _ in self._heap]
+        tracker._entries = dict(self._entries)
+        tracker._version = self._version
+        tracker.turn_last_updated = self.turn_last_updated
+        return tracker
+
+    def push(self, tile: Tile, score, current_turn):
+        """
+        Add tile, or update its score. A tile keeps the turn it was first added until it is dropped.
+        """
+        entry = self._entries.get(tile.tile_id)
+        if entry is not None and entry[1] == score:
+            return
+        turn_added = current_turn if entry is None else entry[2]
+        self._version += 1
+        self._entries[tile.tile_id] = (self._version, score, turn_added)
+        heapq.heappush(self._heap, (score, turn_added, tile.tile_id, self._version, tile))
         self.turn_last_updated = current_turn
+        if len(self._heap) > 4 * len(self._entries) + 64:
+            self._compact()
+
+    def discard(self, tile: Tile):
+        self._entries.pop(tile.tile_id, None)
 
     def get_target(self, turn):
-        # print(self)
-        if turn > 1.5 * self.turn_last_updated + 30:
-            # if we haven't gotten an updated list since a third of the game ago,
-            # it's too old and we should throw it away
-            while self:
-                self.pop()
-        while self:
-            target = self[-1]
-            if target.is_city or target.is_mountain or target.is_basic or target.is_general:
-                self.pop()
+        heap = self._heap
+        while heap:
+            score, turn_added, tile_id, version, target = heap[0]
+            entry = self._entries.get(tile_id)
+            if entry is None or entry[0] != version:  # Replaced or dropped
+                heapq.heappop(heap)
+                continue
+            if turn > 1.5 * turn_added + 30 or \
+                    target.is_city or target.is_mountain or target.is_basic or target.is_general:
+                # if we have been holding on to this target since a third of the game ago,
+                # it's too old and we should throw it away
+                heapq.heappop(heap)
+                del self._entries[tile_id]
                 continue
             return target
         return None
 
+    def _compact(self):
+        self._heap = [item for item in self._heap
+                      if self._entries.get(item[2], (None,))[0] == item[3]]
+        heapq.heapify(self._heap)
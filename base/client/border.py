@@ -0,0 +1,60 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Border: My tiles that border tiles I could move into
+"""
+
+from .constants import *
+
+
+class BorderIndex(object):
+    """
+    My tiles with at least one neighbor that can be entered (not a mountain or obstacle) and is not on my team.
+    Interior tiles never have anything to attack, so routines that look for attacks only need these.
+    Kept up to date from the tiles updated since the last query, plus their neighbors.
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        self._pending = game_map._subscribe_tile_updates()
+        self._border = set()  # tile_id of each border tile
+
+    def __contains__(self, tile):
+        self._refresh()
+        return tile.tile_id in self._border
+
+    def __len__(self):
+        self._refresh()
+        return len(self._border)
+
+    def tiles(self):
+        """
+        :return: List of my border Tiles, by tile_id
+        """
+        self._refresh()
+        grid = self._map.flat_grid
+        return [grid[tile_id] for tile_id in sorted(self._border)]
+
+    # ======================== Maintenance ======================== #
+
+    def _refresh(self):
+        if not self._pending:
+            return
+        adjacency = self._map.adjacency
+        changed = set(self._pending)
+        for tile_id in self._pending:
+            changed.update(adjacency[tile_id])
+        self._pending.clear()
+
+        for tile_id in changed:
+            if self._is_border(tile_id):
+                self._border.add(tile_id)
+            else:
+                self._border.discard(tile_id)
+
+    def _is_border(self, tile_id):
+        if self._map.tile_types[tile_id] != self._map.player_index:
+            return False
+        flags = self._map.tile_flags
+        for neighbor in self._map.adjacency[tile_id]:
+            if not flags[neighbor] & (FLAG_MOUNTAIN | FLAG_OBSTACLE | FLAG_TEAM):
+                return True
+        return False
@@ -0,0 +1,100 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Candidates: Primary target candidates bucketed by opponent type
+"""
+
+from array import array
+import bisect
+import random
+
+from .constants import *
+from .ownership import SortedArmies
+
+
+class TargetCandidates(object):
+    """
+    Valid targets not owned by me, bucketed by opponent type (OPP_GENERAL, OPP_CITY, OPP_ARMY, OPP_EMPTY).
+    Each bucket is a SortedArmies of (army, tile_id). The buckets are brought up to date from the tiles updated
+    since the last query, plus their neighbors (validity depends on neighboring tiles).
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        self._pending = game_map._subscribe_tile_updates()
+        size = game_map.rows * game_map.cols
+        self._buckets = {opp_type: SortedArmies() for opp_type in (OPP_GENERAL, OPP_CITY, OPP_ARMY, OPP_EMPTY)}
+        self._entry_types = bytearray(size)  # Bit 1 << opp_type set for each bucket a tile_id is in
+        self._entry_army = array('d', bytes(8 * size))  # Army of each tile_id's entries
+
+    # ======================== Queries ======================== #
+
+    def below(self, opp_type, max_army):
+        """
+        :return: List of Tiles of opp_type with fewer than max_army armies, in random order
+        """
+        bucket = self._bucket(opp_type)
+        end = bisect.bisect_left(bucket.armies, max_army)
+        tiles = [self._map.flat_grid[tile_id] for tile_id in bucket.tile_ids[:end]]
+        random.shuffle(tiles)
+        return tiles
+
+    def smallest(self, opp_type, max_army=None):
+        """
+        :return: a Tile of opp_type with the fewest armies (ties broken randomly), or None
+        """
+        bucket = self._bucket(opp_type)
+        if not bucket or (max_army is not None and bucket.armies[0] >= max_army):
+            return None
+        end = bisect.bisect_right(bucket.armies, bucket.armies[0])
+        return self._map.flat_grid[random.choice(bucket.tile_ids[:end])]
+
+    def largest(self, opp_type):
+        """
+        :return: a Tile of opp_type with the most armies (ties broken randomly), or None
+        """
+        bucket = self._bucket(opp_type)
+        if not bucket:
+            return None
+        start = bisect.bisect_left(bucket.armies, bucket.armies[-1])
+        return self._map.flat_grid[random.choice(bucket.tile_ids[start:])]
+
+    # ======================== Maintenance ======================== #
+
+    def _bucket(self, opp_type):
+        self._refresh()
+        return self._buckets[opp_type]
+
+    def _refresh(self):
+        if not self._pending:
+            return
+        adjacency = self._map.adjacency
+        changed = set(self._pending)
+        for tile_id in self._pending:
+            changed.update(adjacency[tile_id])
+        self._pending.clear()
+
+        entry_types, entry_army = self._entry_types, self._entry_army
+        for tile_id in changed:
+            tile = self._map.flat_grid[tile_id]
+            for opp_type, bucket in self._buckets.items():  # Remove old entries
+                if entry_types[tile_id] & 1 << opp_type:
+                    bucket.remove(entry_army[tile_id], tile_id)
+            types = 0
+            for opp_type in self._categorize(tile):
+                self._buckets[opp_type].insert(tile.army, tile_id)
+                types |= 1 << opp_type
+            entry_types[tile_id], entry_army[tile_id] = types, tile.army
+
+    def _categorize(self, tile):
+        # Buckets overlap: a general is also an army, an empty city is both a city and an empty tile
+        if tile.tile == self._map.player_index or not tile.is_valid_target():
+            return ()
+        opp_types = []
+        if tile.tile >= 0 and tile.is_general:
+            opp_types.append(OPP_GENERAL)
+        if tile.is_city:
+            opp_types.append(OPP_CITY)
+        elif tile.tile >= 0:
+            opp_types.append(OPP_ARMY)
+        if tile.tile == TILE_EMPTY:
+            opp_types.append(OPP_EMPTY)
+        return opp_types
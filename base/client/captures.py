@@ -0,0 +1,79 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Captures: Generals and cities my neighboring armies could capture
+"""
+
+from .constants import *
+
+
+class CaptureTable(object):
+    """
+    Every (source, target, margin) where one of my tiles is next to a general or city passing Tile.should_attack
+    (apart from the is_dirty check) and has more armies than needed to capture it; margin is the armies to spare.
+    Built in one pass over the generals and cities, reading the Map's flat tile_flags and tile_types arrays, and
+    rebuilt only once a general, a city or one of their neighbors has been updated.
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        self._pending = game_map._subscribe_tile_updates()
+        self._pairs = []
+        self._enemy_neighbors = {}  # tile_id -> number of neighbors held by an enemy, filled in as asked for
+        self._watched = set()  # tile_id of each general, city and their neighbors
+        self._key = None
+
+    def pairs(self):
+        """
+        :return: List of (source, target, margin), generals first and then cities (in Map.generals, Map.cities order)
+        """
+        self._refresh()
+        return self._pairs
+
+    def enemy_neighbors(self, tile):
+        """
+        :return: number of tile's neighbors (apart from mountains and obstacles) held by an enemy
+        """
+        self._refresh()
+        count = self._enemy_neighbors.get(tile.tile_id)
+        if count is None:
+            flags, types = self._map.tile_flags, self._map.tile_types
+            count = sum(1 for n in self._map.adjacency[tile.tile_id]
+                        if types[n] >= 0 and not flags[n] & (FLAG_MOUNTAIN | FLAG_OBSTACLE | FLAG_TEAM))
+            self._enemy_neighbors[tile.tile_id] = count
+        return count
+
+    # ======================== Maintenance ======================== #
+
+    def _refresh(self):
+        game_map = self._map
+        key = (len(game_map.cities), tuple(game_map.generals), tuple(game_map.do_not_attack_players))
+        if key == self._key and self._watched.isdisjoint(self._pending):
+            self._pending.clear()
+            return
+        self._pending.clear()
+        self._enemy_neighbors = {}
+        targets = [general for general in game_map.generals if general is not None] + game_map.cities
+        if key != self._key:
+            self._key = key
+            self._watched = {n for target in targets for n in game_map.adjacency[target.tile_id]}
+            self._watched.update(target.tile_id for target in targets)
+
+        grid, flags, types = game_map.flat_grid, game_map.tile_flags, game_map.tile_types
+        adjacency = game_map.adjacency
+        player_index = game_map.player_index
+        excluded = {TILE_MOUNTAIN, TILE_FOG, TILE_OBSTACLE}
+        excluded.update(game_map.my_team)
+        excluded.update(game_map.do_not_attack_players)
+
+        self._pairs = []
+        for target in targets:
+            i = target.tile_id
+            # should_attack: visible, not my team's, not on the do not attack list, next to a tile I have held
+            if types[i] in excluded:
+                continue
+            neighbors = [n for n in adjacency[i] if not flags[n] & (FLAG_MOUNTAIN | FLAG_OBSTACLE)]
+            if not any(flags[n] & FLAG_HELD for n in neighbors):
+                continue
+            needed = max(1, target.army + 1)
+            for n in neighbors:
+                if types[n] == player_index and not flags[n] & FLAG_SWAMP and grid[n].army > needed:
+                    self._pairs.append((grid[n], target, grid[n].army - needed))
@@ -0,0 +1,70 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Move Coalescer: Drops moves that would waste a send (and a turn of the server's queue)
+"""
+
+import threading
+
+
+class MoveCoalescer(object):
+    """
+    Checked by Generals.move before an attack is queued for the writer. A move is not sent when:
+    - it is already queued on the server (duplicate)
+    - its source will not be mine with at least 2 armies once the pending moves are executed (invalid)
+    A single move that is sent replaces the single moves for the same turn the writer has not sent yet (superseded), so
+    only the latest intended move of a turn goes out. avoided counts the sends saved for each reason.
+    """
+    def __init__(self):
+        self.avoided = {"duplicate": 0, "invalid": 0, "superseded": 0}
+        self._unsent = {}  # Writer frame order -> (move_id, turn, is single move) of moves not sent yet
+        self._cancelled = set()  # Writer frame orders not to send
+        self._lock = threading.Lock()  # Between the thread queueing moves and the writer
+
+    def reason_to_drop(self, game_map, move_queue, source, dest, move_half):
+        """
+        :param source: tile id
+        :param dest: tile id
+        :return: "duplicate" or "invalid" if the move should not be sent, otherwise None
+        """
+        reason = None
+        if any(move.source == source and move.dest == dest and move.move_half == move_half for move in move_queue):
+            reason = "duplicate"
+        elif game_map.pending_moves.owner(source) != game_map.player_index or \
+                game_map.pending_moves.army(source) < 2:
+            reason = "invalid"
+        if reason is not None:
+            self.avoided[reason] += 1
+        return reason
+
+    def supersede(self, turn):
+        """
+        Cancel the single moves for turn that the writer has not sent yet
+        :return: List of the move_ids cancelled
+        """
+        cancelled = []
+        with self._lock:
+            for order, (move_id, move_turn, single) in list(self._unsent.items()):
+                if single and move_turn == turn:
+                    del self._unsent[order]
+                    self._cancelled.add(order)
+                    cancelled.append(move_id)
+        self.avoided["superseded"] += len(cancelled)
+        return cancelled
+
+    def queued(self, order, move_id, turn, single):
+        with self._lock:
+            self._unsent[order] = (move_id, turn, single)
+
+    def should_send(self, order):
+        """
+        Called by the writer before sending each frame
+        """
+        with self._lock:
+            self._unsent.pop(order, None)
+            if order in self._cancelled:
+                self._cancelled.discard(order)
+                return False
+            return True
+
+    def report(self):
+        return ", ".join("%s %d" % (reason, count) for reason, count in self.avoided.items())
@@ -4,12 +4,14 @@
     Constants: Constants used throughout the code
 """
 
-SHOULD_DIRTY_MAP_ON_MOVE = True
+SHOULD_DIRTY_MAP_ON_MOVE = True  # Track sent moves in Map.pending_moves until the server executes them
 
 ENDPOINT_BOT = "ws://botws.generals.io/socket.io/?EIO=3&transport=websocket"
 ENDPOINT_PUBLIC = "ws://ws.generals.io/socket.io/?EIO=3&transport=websocket"
 BOT_KEY = "sd09fjd203i0ejwi"
 
+RECORDED_EVENTS = {"game_start", "game_update", "game_won", "game_lost"}  # Frames saved by GameRecorder
+
 REPLAY_URLS = {
     'na': "http://generals.io/replays/",
     'eu': "http://eu.generals.io/replays/",
@@ -54,6 +56,30 @@ TILE_MOUNTAIN = -2
 TILE_FOG = -3
 TILE_OBSTACLE = -4
 
+# Tile Flags (Map.tile_flags bits, used to filter neighbors by tile id)
+FLAG_MOUNTAIN = 1
+FLAG_SWAMP = 2
+FLAG_CITY = 4
+FLAG_OBSTACLE = 8
+FLAG_TEAM = 16
+FLAG_HELD = 32  # Tile has been held by me at some point (turn_held > 0)
+
+DISTANCE_CACHE_BYTES = 4 * 1024 * 1024  # Memory cap for cached walking distance fields (per map)
+SEARCH_CHUNK = 256  # Tiles a search expands between the points where an anytime routine may be stopped
+
+# Move Timing
+TURN_INTERVAL = 0.5  # Seconds per turn at game speed 1 (game speed 4: 0.125)
+TURN_INTERVAL_SMOOTHING = 0.2  # Weight of each measured turn interval in the running estimate
+MOVE_DEADLINE_FRACTION = 0.75  # Fraction of the turn interval after an update by which a move must be sent
+
+# Outgoing Frames (lower is sent first)
+SEND_PRIORITY_MOVE = 0
+SEND_PRIORITY_LOBBY = 1  # Lobby options, chat, joining
+SEND_PRIORITY_PING = 2
+SEND_PRIORITY_STOP = 3  # Stops the writer once everything before it is sent
+PING_INTERVAL = 25  # Seconds between Engine.IO pings, until the server's open packet says otherwise
+PING_MAX_WAIT = 5  # Seconds a ping waits behind other frames before it is sent ahead of them
+
 # Opponent Type Definitions
 OPP_EMPTY = 0
 OPP_ARMY = 1
@@ -0,0 +1,72 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Distances: Cached walking distance fields
+"""
+
+from array import array
+from collections import OrderedDict
+
+from .constants import *
+
+UNREACHABLE = -1
+
+
+def walk_class(flags):
+    """
+    :return: 2 if a tile cannot be entered, 1 if it can be reached but not walked through
+        (obstacles and cities my team does not own), otherwise 0
+    """
+    if flags & FLAG_MOUNTAIN:
+        return 2
+    if flags & (FLAG_OBSTACLE | FLAG_CITY) and not flags & FLAG_TEAM:
+        return 1
+    return 0
+
+
+class DistanceFields(object):
+    """
+    Walking distances from a source tile to every tile on the map.
+    A field is computed by BFS the first time its source is asked for, and kept in an LRU cache limited to
+    max_bytes. Every field is dropped when Map.terrain_version changes, which happens only when a tile's
+    walk_class changes (a mountain or obstacle is discovered, a city changes hands).
+    """
+    def __init__(self, game_map, max_bytes=DISTANCE_CACHE_BYTES):
+        self._map = game_map
+        self.max_bytes = max_bytes
+        self._fields = OrderedDict()  # source tile_id -> array of distances (UNREACHABLE if not reachable)
+        self._terrain_version = game_map.terrain_version
+
+    def field(self, source):
+        """
+        :param source: Tile
+        :return: array indexed by tile_id of the walking distance from source
+        """
+        if self._terrain_version != self._map.terrain_version:
+            self._fields.clear()
+            self._terrain_version = self._map.terrain_version
+
+        field = self._fields.get(source.tile_id)
+        if field is not None:
+            self._fields.move_to_end(source.tile_id)
+            return field
+
+        field = self._compute(source.tile_id)
+        self._fields[source.tile_id] = field
+        while len(self._fields) > 1 and len(self._fields) * field.itemsize * len(field) > self.max_bytes:
+            self._fields.popitem(last=False)
+        return field
+
+    def distance(self, source, dest):
+        """
+        :return: number of moves to walk from source to dest, or UNREACHABLE
+        """
+        return self.field(source)[dest.tile_id]
+
+    def _compute(self, source):
+        search = self._map.search
+        count = search.bfs([source], FLAG_MOUNTAIN, block=FLAG_OBSTACLE | FLAG_CITY)
+        field = array('i', [UNREACHABLE]) * search.size
+        queue, distance = search.queue, search.distance
+        for k in range(count):
+            field[queue[k]] = distance[queue[k]]
+        return field
@@ -0,0 +1,181 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Exploration: Unexplored obstacles ordered by walking distance from my territory
+"""
+
+import heapq
+
+from .constants import *
+from .distances import UNREACHABLE, walk_class
+from .TargetTracker import TargetTracker
+
+INFINITE_DISTANCE = 2 ** 31 - 1
+
+
+class ExplorationFrontier(object):
+    """
+    Obstacles I have never seen (fog tiles that may be mountains or cities) that can be reached from my
+    territory, scored by walking distance from it (same walking rules as DistanceFields), then by how many of
+    their neighbors are unknown (more first), then by how long they have been targets.
+
+    Distances are kept up to date from the tiles updated each turn instead of being searched again: a tile that
+    becomes mine or easier to walk through spreads shorter distances outward, and a tile I lose (or that becomes
+    harder to walk through) resets only the tiles whose distance depended on it. A target is pushed to the
+    TargetTracker again whenever its score changes, and the tracker skips the older entries.
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        self._pending = game_map._subscribe_tile_updates()
+        self._size = game_map.rows * game_map.cols
+        self.distance = [INFINITE_DISTANCE] * self._size  # Moves from my territory of each tile_id
+        self._is_source = [False] * self._size  # Whether each tile was mine at the last refresh
+        self._walk_class = [2] * self._size  # walk_class of each tile at the last refresh
+        self.targets = TargetTracker()
+        self._built = False
+
+    def nearest(self):
+        """
+        :return: the unexplored obstacle nearest to my territory, or None
+        """
+        self._refresh()
+        return self.targets.get_target(self._map.turn)
+
+    def distance_to(self, tile):
+        """
+        :return: number of moves from my territory to tile, or UNREACHABLE
+        """
+        self._refresh()
+        distance = self.distance[tile.tile_id]
+        return UNREACHABLE if distance == INFINITE_DISTANCE else distance
+
+    def copy(self, game_map):
+        """
+        :return: a copy of this frontier on game_map, a clone of this map (see Map.clone). Copied rather than
+            rebuilt, as the targets remember the turn they were first added
+        """
+        frontier = ExplorationFrontier(game_map)
+        frontier._pending.update(self._pending)
+        frontier.distance = list(self.distance)
+        frontier._is_source = list(self._is_source)
+        frontier._walk_class = list(self._walk_class)
+        frontier.targets = self.targets.copy(game_map.flat_grid)
+        frontier._built = self._built
+        return frontier
+
+    # ======================== Maintenance ======================== #
+
+    def _refresh(self):
+        if not self._pending:
+            return
+        updated = list(self._pending)
+        self._pending.clear()
+        if not self._built:
+            self._rebuild()
+            return
+
+        changed = []
+        worse = []
+        for tile_id in updated:
+            is_source, walk = self._tile_state(tile_id)
+            if is_source == self._is_source[tile_id] and walk == self._walk_class[tile_id]:
+                continue
+            changed.append(tile_id)
+            if (self._is_source[tile_id] and not is_source) or walk > self._walk_class[tile_id]:
+                worse.append(tile_id)
+            self._is_source[tile_id], self._walk_class[tile_id] = is_source, walk
+
+        if changed:
+            reset = self._reset(worse)
+            self._spread(reset + changed)
+            for tile_id in reset:
+                self._push_target(tile_id)
+
+        # Targets whose unknown neighbor count may have changed without their distance changing
+        adjacency = self._map.adjacency
+        for tile_id in set(updated).union(*(adjacency[tile_id] for tile_id in updated)):
+            self._push_target(tile_id)
+
+    def _rebuild(self):
+        for tile_id in range(self._size):
+            self._is_source[tile_id], self._walk_class[tile_id] = self._tile_state(tile_id)
+            self.distance[tile_id] = INFINITE_DISTANCE
+        self._built = True
+        self._spread([tile_id for tile_id in range(self._size) if self._is_source[tile_id]])
+
+    def _reset(self, worse):
+        """
+        Reset the distance of every tile whose distance can no longer be reached because of the tiles in worse
+        (tiles no longer mine, or harder to walk through), along with the tiles whose route went through them.
+        :return: List of tile ids that were reset
+        """
+        adjacency, distance, walk = self._map.adjacency, self.distance, self._walk_class
+        reset = set()
+        candidates = list(worse)
+        for tile_id in worse:
+            candidates.extend(adjacency[tile_id])
+
+        while candidates:
+            tile_id = candidates.pop()
+            tile_distance = distance[tile_id]
+            if tile_id in reset or tile_distance == INFINITE_DISTANCE:
+                continue
+            if walk[tile_id] < 2 and (self._is_source[tile_id] or any(
+                    walk[neighbor] == 0 and distance[neighbor] == tile_distance - 1 and neighbor not in reset
+                    for neighbor in adjacency[tile_id])):
+                continue  # Still reached the same way
+            reset.add(tile_id)
+            candidates.extend(neighbor for neighbor in adjacency[tile_id]
+                              if distance[neighbor] == tile_distance + 1)
+
+        for tile_id in reset:
+            distance[tile_id] = INFINITE_DISTANCE
+        return list(reset)
+
+    def _spread(self, tile_ids):
+        """
+        Bring tile_ids up to date from their neighbors, then spread any shorter distances outward
+        """
+        adjacency, distance, walk = self._map.adjacency, self.distance, self._walk_class
+        size = self._size
+        heap = []
+        for tile_id in tile_ids:
+            if self._is_source[tile_id]:
+                distance[tile_id] = 0
+            elif walk[tile_id] < 2:
+                for neighbor in adjacency[tile_id]:
+                    if walk[neighbor] == 0 and distance[neighbor] + 1 < distance[tile_id]:
+                        distance[tile_id] = distance[neighbor] + 1
+            if distance[tile_id] != INFINITE_DISTANCE:
+                heap.append(distance[tile_id] * size + tile_id)
+        heapq.heapify(heap)
+
+        while heap:
+            tile_distance, tile_id = divmod(heapq.heappop(heap), size)
+            if tile_distance != distance[tile_id]:
+                continue
+            self._push_target(tile_id)
+            if walk[tile_id] != 0:  # Reached but not walked through
+                continue
+            for neighbor in adjacency[tile_id]:
+                if walk[neighbor] < 2 and tile_distance + 1 < distance[neighbor]:
+                    distance[neighbor] = tile_distance + 1
+                    heapq.heappush(heap, distance[neighbor] * size + neighbor)
+
+    # ======================== PRIVATE FUNCTIONS ======================== #
+
+    def _tile_state(self, tile_id):
+        return self._map.tile_types[tile_id] == self._map.player_index, walk_class(self._map.tile_flags[tile_id])
+
+    def _is_target(self, tile_id):
+        if self._map.tile_types[tile_id] != TILE_OBSTACLE or \
+                self._map.tile_flags[tile_id] & (FLAG_MOUNTAIN | FLAG_CITY):
+            return False
+        tile = self._map.flat_grid[tile_id]
+        return not tile.is_general and not tile.is_basic
+
+    def _push_target(self, tile_id):
+        tile = self._map.flat_grid[tile_id]
+        if self.distance[tile_id] == INFINITE_DISTANCE or not self._is_target(tile_id):
+            self.targets.discard(tile)
+        else:
+            self.targets.push(tile, (self.distance[tile_id], -tile.unknown_neighbor_count()), self._map.turn)
@@ -0,0 +1,130 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Flow: Per-turn multi-source distance fields toward my largest army and toward a set of tiles
+"""
+
+from array import array
+
+from .constants import *
+from .distances import UNREACHABLE
+from .search import finish
+
+
+class FlowField(object):
+    """
+    Walking distances from a set of source tiles (same walking rules as DistanceFields), with every tile's
+    next hop toward its nearest source and that source. Filled by build_steps.
+    """
+    def __init__(self, game_map, sources):
+        self._map = game_map
+        self.sources = tuple(sources)  # Source tile ids
+        size = game_map.search.size
+        self.distance = array('i', [UNREACHABLE]) * size  # Moves to the nearest source
+        self.next_hop = array('i', [-1]) * size  # Next tile id toward the nearest source (-1 at sources)
+        self.root = array('i', [-1]) * size  # Nearest source tile id
+
+    def build_steps(self):
+        """
+        Fill the field by one multi-source BFS. Yields None while searching (see SearchKernel.bfs_steps).
+        :return: self
+        """
+        search = self._map.search
+        count = yield from search.bfs_steps(self.sources, FLAG_MOUNTAIN, block=FLAG_OBSTACLE | FLAG_CITY)
+        queue, parent, distance = search.queue, search.parent, search.distance
+        for i in queue[:count]:  # Parents are always found before their children
+            self.distance[i] = distance[i]
+            self.next_hop[i] = parent[i]
+            self.root[i] = i if parent[i] == -1 else self.root[parent[i]]
+        return self
+
+    def nearest(self, tile):
+        """
+        :return: the source Tile nearest to tile, or None if none can be reached
+        """
+        root = self.root[tile.tile_id]
+        return None if root == -1 else self._map.flat_grid[root]
+
+    def path(self, tile):
+        """
+        :return: List of Tiles from tile to the nearest source, or [] if none can be reached
+        """
+        if self.root[tile.tile_id] == -1:
+            return []
+        grid, next_hop = self._map.flat_grid, self.next_hop
+        path = [tile]
+        current = next_hop[tile.tile_id]
+        while current != -1:
+            path.append(grid[current])
+            current = next_hop[current]
+        return path
+
+
+class FlowFields(object):
+    """
+    The flow fields routines share each turn: toward my largest army (gathering), and toward the last set of tiles
+    asked for (ex: the nearest tile of Map.path). Each is built the first time it is asked for and rebuilt after
+    the map changes (Map.state_version).
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        self._fields = {}  # name -> FlowField, for the current state_version
+        self._custom = (None, None)  # (key, FlowField) of the last field_from call
+        self._state_version = None
+
+    @property
+    def largest(self):
+        return finish(self.largest_steps())
+
+    def largest_steps(self):
+        """
+        largest for anytime routines: yields None while the field is built, and returns it
+        """
+        return self._field_steps('largest', lambda: self._tile_ids([self._map.find_largest_tile()]))
+
+    def field_from(self, tiles):
+        """
+        :param tiles: List of source Tiles, ex: Map.path
+        :return: FlowField toward the nearest of tiles. The last one built is kept until the map changes.
+        """
+        self._check_version()
+        key = tuple(tile.tile_id for tile in tiles)
+        if self._custom[0] != key:
+            self._custom = (key, finish(FlowField(self._map, key).build_steps()))
+        return self._custom[1]
+
+    def release(self):
+        """
+        Drop the fields built before the map last changed, see Map.update
+        """
+        self._check_version()
+
+    def distances(self, tile):
+        """
+        :return: walking distances from tile, read from this turn's largest field when tile is its only source,
+            otherwise from Map.distances
+        """
+        self._check_version()
+        for field in self._fields.values():
+            if field.sources == (tile.tile_id,):
+                return field.distance
+        return self._map.distances.field(tile)
+
+    # ======================== PRIVATE FUNCTIONS ======================== #
+
+    def _check_version(self):
+        if self._state_version != self._map.state_version:
+            self._fields.clear()
+            self._custom = (None, None)
+            self._state_version = self._map.state_version
+
+    def _field_steps(self, name, sources):
+        self._check_version()
+        field = self._fields.get(name)
+        if field is None:  # A field stopped part way is not kept
+            field = yield from FlowField(self._map, sources()).build_steps()
+            self._fields[name] = field
+        return field
+
+    @staticmethod
+    def _tile_ids(tiles):
+        return [tile.tile_id for tile in tiles if tile is not None]
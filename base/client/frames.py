@@ -0,0 +1,34 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Frames: Decoding the Engine.IO/Socket.IO frames received from the server
+"""
+
+import json
+
+try:  # Optional faster JSON backend
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    json_loads = json.loads
+    JSON_BACKEND = "json"
+
+_DIGITS = "0123456789"
+
+
+def split_frame(frame):
+    """
+    :return: (numeric Engine.IO/Socket.IO packet prefix, payload), ex: "42[...]" -> ("42", "[...]")
+    """
+    payload = frame.lstrip(_DIGITS)
+    return frame[:len(frame) - len(payload)], payload
+
+
+def decode_frame(frame):
+    """
+    :return: (packet prefix, decoded JSON payload, or None if the frame has no payload)
+    """
+    prefix, payload = split_frame(frame)
+    if not payload:
+        return prefix, None
+    return prefix, json_loads(payload)
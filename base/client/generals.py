@@ -4,15 +4,22 @@
     Generals.io Web Socket Communication
 """
 
+from collections import deque
+import itertools
 import logging
 import json
+from queue import PriorityQueue
 import threading
 import time
 from websocket import create_connection, WebSocketConnectionClosedException
 
 from .constants import *
 from . import bot_cmds
+from . import frames
 from . import map
+from . import recorder
+from .coalescer import MoveCoalescer
+from .move_queue import MoveQueue
 
 
 class Generals(object):
@@ -22,16 +29,19 @@ class Generals(object):
 
         self.username = username
         self.is_paused = False
+        self._exited = False  # Set when the server refuses the connection (ex: user already in game queue)
+        self.game_speed = 1
         self._seen_update = False
         self._move_id = 1
+        self._move_queue = MoveQueue()
+        self._moves_lock = threading.RLock()  # Guards _move_queue and the map's pending_moves
         self._start_data = {}
         self._stars = []
         self._cities = []
-        self._messages_to_save = []
+        self._recorder = None  # GameRecorder of the current game
 
     def close(self):
-        with self._lock:
-            self._ws.close()
+        self._send_frame(None, SEND_PRIORITY_STOP)
 
     # ======================== Get updates from server ======================== #
 
@@ -45,47 +55,68 @@ class Generals(object):
             if not msg.strip():
                 break
 
-            # ignore heartbeats and connection acks
-            if msg in {"3", "40"}:
-                continue
-
-            # remove numeric prefix
-            while msg and msg[0].isdigit():
-                msg = msg[1:]
-
-            msg = json.loads(msg)
-            if not isinstance(msg, list):
-                continue
-
-            if msg[0] == "error_user_id":
-                logging.info("Exit: User already in game queue")
+            update = self._handle_frame(msg)
+            if self._exited:
                 return
-            elif msg[0] == "queue_update":
-                self._log_queue_update(msg[1])
-            elif msg[0] == "pre_game_start":
-                logging.info("pre_game_start")
-            elif msg[0] == "game_start":
-                self._messages_to_save.append(msg)
-                self._start_data = msg[1]
-            elif msg[0] == "game_update":
-                self._messages_to_save.append(msg)
-                yield self._make_update(msg[1])
-            elif msg[0] in ["game_won", "game_lost"]:
-                yield self._make_result(msg[0], msg[1])
-            elif msg[0] == "chat_message":
-                self._handle_chat(msg[2])
-            elif msg[0] == "error_set_username":
-                pass
-            elif msg[0] == "game_over":
-                pass
-            elif msg[0] == "notify":
-                pass
-            else:
-                logging.info("Unknown message type: {}".format(msg))
+            if update is not None:
+                yield update
+
+    def _handle_frame(self, frame):
+        """
+        Handle one frame received from the server
+        :return: the Map to hand to the bot (game_update, game_won, game_lost), otherwise None
+        """
+        # ignore heartbeats and connection acks
+        if frame in {"3", "40"}:
+            return None
+
+        prefix, msg = frames.decode_frame(frame)
+        if not isinstance(msg, list):
+            if isinstance(msg, dict) and 'pingInterval' in msg:  # Engine.IO open packet
+                self._handshake(msg)
+            return None
+
+        handler = self._frame_handlers.get(msg[0])
+        if handler is None:
+            logging.info("Unknown message type: {}".format(msg))
+            return None
+        if msg[0] in RECORDED_EVENTS:
+            self._record_frame(msg, frame)
+        return handler(self, msg)
+
+    def _on_error_user_id(self, msg):
+        logging.info("Exit: User already in game queue")
+        self._exited = True
+
+    def _on_game_start(self, msg):
+        self._start_data = msg[1]
+
+    def _on_game_update(self, msg):
+        return self._make_update(msg[1])
+
+    _frame_handlers = {  # Socket.IO event name -> handler(self, msg), returning a Map to yield or None
+        "error_user_id": _on_error_user_id,
+        "queue_update": lambda self, msg: self._log_queue_update(msg[1]),
+        "pre_game_start": lambda self, msg: logging.info("pre_game_start"),
+        "game_start": _on_game_start,
+        "game_update": _on_game_update,
+        "game_won": lambda self, msg: self._make_result(msg[0], msg[1]),
+        "game_lost": lambda self, msg: self._make_result(msg[0], msg[1]),
+        "chat_message": lambda self, msg: self._handle_chat(msg[2]),
+        "error_set_username": lambda self, msg: None,
+        "game_over": lambda self, msg: None,
+        "notify": lambda self, msg: None,
+    }
 
     # ======================== Make Moves ======================== #
 
-    def move(self, y1, x1, y2, x2, move_half=False):
+    def move(self, y1, x1, y2, x2, move_half=False, single=True):
+        """
+        Queue an attack on the server. Queued attacks are executed one per turn, in order.
+        Duplicate and invalid attacks are not sent, see MoveCoalescer.
+        :param single: if True, replace the moves for this turn not sent yet. False for moves sent as a sequence.
+        :return: move_id of the attack, or False if paused or not sent
+        """
         if not self._seen_update:
             raise ValueError("Cannot move before first map seen")
 
@@ -95,8 +126,46 @@ class Generals(object):
         cols = self._map.cols
         a = y1 * cols + x1
         b = y2 * cols + x2
-        self._send(["attack", a, b, move_half, self._move_id])
-        self._move_id += 1
+        turn = self._map.turn
+        with self._moves_lock:
+            if self._coalescer.reason_to_drop(self._map, self._move_queue, a, b, move_half):
+                return False  # Checked first: a dropped move leaves the moves it would have superseded queued
+            if single:
+                for move_id in self._coalescer.supersede(turn):
+                    self._move_queue.remove(move_id)
+                    self._map.pending_moves.remove(move_id)
+
+            move_id = self._move_id
+            self._move_id += 1
+            self._move_queue.push(move_id, a, b, move_half)
+            if SHOULD_DIRTY_MAP_ON_MOVE:
+                self._map.pending_moves.add(move_id, a, b, move_half)
+            order = next(self._send_order)
+            self._coalescer.queued(order, move_id, turn, single)  # Before the writer can take the frame
+            self._send(["attack", a, b, move_half, move_id], SEND_PRIORITY_MOVE, order)
+        return move_id
+
+    def clear_moves(self):
+        """
+        Drop every attack still queued on the server
+        :return: List of the QueuedMoves dropped
+        """
+        with self._moves_lock:
+            self._send(["clear_moves"], SEND_PRIORITY_MOVE)
+            self._map.pending_moves.sync(())
+            return self._move_queue.clear()
+
+    @property
+    def queued_moves(self):
+        with self._moves_lock:
+            return tuple(self._move_queue)
+
+    def snapshot(self):
+        """
+        :return: (Map.clone() of the map, tuple of the QueuedMoves), taken between two updates
+        """
+        with self._moves_lock:
+            return self._map.clone(), tuple(self._move_queue)
 
     # ======================== Send Chat Messages ======================== #
 
@@ -117,6 +186,9 @@ class Generals(object):
     # ======================== Server -> Client ======================== #
 
     def _log_queue_update(self, msg):
+        if 'options' in msg and 'game_speed' in msg['options']:
+            self.game_speed = int(msg['options']['game_speed'])
+
         if 'queueTimeLeft' in msg:
             logging.info("Queue (%ds) %d/%d" % (msg['queueTimeLeft'], msg['numForce'], msg['numPlayers']))
             return
@@ -144,10 +216,23 @@ class Generals(object):
             logging.info("Joined Game: %s - %s" % (self._map.replay_url, self._map.usernames))
             return self._map
 
-        return self._map.update(data)
+        with self._moves_lock:  # move may be called from the bot's thread meanwhile
+            self._move_queue.advance(data['turn'] - self._map.turn)
+            self._map.update(data)
+            if self._move_queue and not self._move_queue.check(self._map):
+                logging.debug("Turn %d: queued moves no longer match the map, clearing them" % self._map.turn)
+                self.clear_moves()
+            self._map.pending_moves.sync({move.move_id for move in self._move_queue})
+        return self._map
 
     def _make_result(self, update, data):
-        self._save_messages_to_disk()
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+        if self.move_latencies:
+            logging.info("Move send latency: %.1f ms mean, %.1f ms max" % (
+                1000 * sum(self.move_latencies) / len(self.move_latencies), 1000 * max(self.move_latencies)))
+        logging.info("Moves not sent: %s" % self._coalescer.report())
         return self._map.update_result(update)
 
     def _handle_chat(self, chat_msg):
@@ -170,8 +255,17 @@ class Generals(object):
     def _connect_and_join(self, userid, username, mode, gameid, force_start, public_server):
         logging.debug("Creating connection")
         self._ws = create_connection(ENDPOINT_BOT if not public_server else ENDPOINT_PUBLIC)
-        self._lock = threading.RLock()
+        self._init_sending()
+        self._outgoing = PriorityQueue()  # (priority, order, frame, time queued), see _send_frame
+        self._handshake_done = threading.Event()
+        _spawn(self._start_writing)
         _spawn(self._start_sending_heartbeat)
+        self._join(userid, username, mode, gameid)
+
+        if force_start:
+            _spawn(self.send_forcestart)
+
+    def _join(self, userid, username, mode, gameid):
         self._send(["set_username", userid, username, BOT_KEY])
 
         logging.info("Joining game")
@@ -190,17 +284,66 @@ class Generals(object):
         else:
             raise ValueError("Invalid mode")
 
-        if force_start:
-            _spawn(self.send_forcestart)
+    def _init_sending(self):
+        self.ping_interval = PING_INTERVAL  # Seconds between heartbeats, from the server's open packet
+        self.move_latencies = deque(maxlen=200)  # Seconds from move() until each recent attack was sent
+        self._coalescer = MoveCoalescer()
+        self._send_order = itertools.count()  # Keeps frames of the same priority in the order queued
+        self._ping_queued_at = None  # When the ping waiting in the writer's queue was queued, see _take_ping
+        self._writing = True
+
+    def _handshake(self, open_packet):
+        self.ping_interval = open_packet['pingInterval'] / 1000
+        self._handshake_done.set()
 
     def _start_sending_heartbeat(self):
+        self._handshake_done.wait(PING_INTERVAL)
+        while self._writing:
+            self._queue_ping()
+            time.sleep(self.ping_interval)
+
+    def _start_writing(self):
+        # The only thread writing to the websocket: frames are sent by priority, moves first and heartbeats last
         while True:
+            priority, order, frame, queued_at = self._outgoing.get()
+            if frame is None:
+                break
+            if priority == SEND_PRIORITY_MOVE and not self._coalescer.should_send(order):
+                continue
+            if priority == SEND_PRIORITY_PING and not self._take_ping():
+                continue  # Already sent ahead of its turn
             try:
-                with self._lock:
+                if priority != SEND_PRIORITY_PING and self._take_ping(overdue_only=True):
                     self._ws.send("2")
+                self._ws.send(frame)
             except WebSocketConnectionClosedException:
                 break
-            time.sleep(0.1)
+            self._frame_sent(priority, queued_at)
+        self._writing = False
+        self._ws.close()
+
+    def _queue_ping(self):
+        if self._ping_queued_at is None:
+            self._ping_queued_at = time.perf_counter()
+        self._send_frame("2", SEND_PRIORITY_PING)
+
+    def _take_ping(self, overdue_only=False):
+        """
+        Pings are sent after every other frame, but one that has waited PING_MAX_WAIT is sent ahead of the next
+        frame instead (a long backlog must not hold it back until the server times out), and then skipped once
+        it comes up in the queue
+        :param overdue_only: True to take the queued ping only if it has waited PING_MAX_WAIT
+        :return: True if the queued ping is to be sent now
+        """
+        queued_at = self._ping_queued_at
+        if queued_at is None or (overdue_only and time.perf_counter() - queued_at < PING_MAX_WAIT):
+            return False
+        self._ping_queued_at = None
+        return True
+
+    def _frame_sent(self, priority, queued_at):
+        if priority == SEND_PRIORITY_MOVE:
+            self.move_latencies.append(time.perf_counter() - queued_at)
 
     def send_forcestart(self, delay=20):
         time.sleep(delay)
@@ -210,6 +353,7 @@ class Generals(object):
     def set_game_speed(self, speed="1"):
         speed = int(speed)
         if speed in [1, 2, 3, 4]:
+            self.game_speed = speed
             self._send(["set_custom_options", self._gameid, {"game_speed": speed}])
 
     def set_game_team(self, team="1"):
@@ -240,22 +384,28 @@ class Generals(object):
     def send_surrender(self):
         self._send(["surrender"])
 
-    def _send(self, msg):
-        try:
-            with self._lock:
-                self._ws.send("42" + json.dumps(msg))
-        except WebSocketConnectionClosedException:
-            pass
+    def _send(self, msg, priority=SEND_PRIORITY_LOBBY, order=None):
+        """
+        :param order: order of the frame in the writer's queue, if already taken from _send_order
+        :return: order of the frame in the writer's queue
+        """
+        return self._send_frame("42" + json.dumps(msg), priority, order)
 
-    # ======================== Game Replay ======================== #
+    def _send_frame(self, frame, priority, order=None):
+        if order is None:
+            order = next(self._send_order)
+        self._outgoing.put((priority, order, frame, time.perf_counter()))
+        return order
 
-    def _save_messages_to_disk(self):
-        file_name = "game_" + self._map.replay_url + ".txt"
-        file_name = file_name.replace("/", ".")
-        file_name = file_name.replace(":", "")
+    # ======================== Game Replay ======================== #
 
-        with open("games/" + file_name, 'w+') as file:
-            file.write(str(self._messages_to_save))
+    def _record_frame(self, msg, frame):
+        if msg[0] == "game_start":
+            if self._recorder is not None:
+                self._recorder.close(wait=False)
+            self._recorder = recorder.GameRecorder(recorder.recording_path(REPLAY_URLS["na"] + msg[1]['replay_id']))
+        if self._recorder is not None:
+            self._recorder.record(frame)
 
 
 def _spawn(f):
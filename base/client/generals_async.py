@@ -0,0 +1,122 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Generals.io asyncio Client
+"""
+
+import asyncio
+import logging
+import time
+
+from .constants import *
+from .generals import Generals
+from .transport import WebSocketTransport
+
+
+class AsyncGenerals(Generals):
+    """
+    Generals with the connection run as tasks on one asyncio loop: receiving, sending (through the same
+    priority queue as Generals, so nothing waits on a lock) and the heartbeat. The public API is the same, except
+    that get_updates is an async iterator and the connection is opened by awaiting connect():
+
+        client = AsyncGenerals(userid, username, "private", gameid)
+        await client.connect()
+        async for game_map in client.get_updates():
+            client.move(...)
+
+    transport defaults to a websocket to the generals.io server; see transport.LocalTransport for an in-process
+    connection. move, send_chat and the set_* methods may be called from other threads.
+    """
+    def __init__(self, userid, username, mode="1v1", gameid=None, force_start=True, public_server=False,
+                 transport=None):
+        if transport is None:
+            transport = WebSocketTransport(ENDPOINT_BOT if not public_server else ENDPOINT_PUBLIC)
+        self._transport = transport
+        self._loop = None
+        self._tasks = []
+        Generals.__init__(self, userid, username, mode, gameid, force_start, public_server)
+
+    async def connect(self):
+        userid, username, mode, gameid, force_start = self._join_args
+        self._loop = asyncio.get_running_loop()
+        self._init_sending()
+        self._outgoing = asyncio.PriorityQueue()  # (priority, order, frame, time queued), see _send_frame
+        self._handshake_done = asyncio.Event()
+        self._updates = asyncio.Queue()  # Maps for get_updates, None ends it
+
+        logging.debug("Creating connection")
+        await self._transport.connect()
+        self._tasks = [self._loop.create_task(f()) for f in (self._receive, self._sender, self._heartbeat)]
+        self._join(userid, username, mode, gameid)
+        if force_start:
+            self._tasks.append(self._loop.create_task(self._send_forcestart_after(20)))
+
+    # ======================== Get updates from server ======================== #
+
+    async def get_updates(self):
+        while True:
+            update = await self._updates.get()
+            if update is None:
+                break
+            yield update
+
+    async def _receive(self):
+        try:
+            while True:
+                msg = await self._transport.recv()
+                if msg is None or not msg.strip():
+                    break
+                update = self._handle_frame(msg)
+                if self._exited:
+                    break
+                if update is not None:
+                    self._updates.put_nowait(update)
+        finally:
+            self._updates.put_nowait(None)  # End get_updates
+            self.close()
+
+    # ======================== Client -> Server ======================== #
+
+    def _connect_and_join(self, userid, username, mode, gameid, force_start, public_server):
+        self._join_args = (userid, username, mode, gameid, force_start)  # Joined once connected
+
+    def _send_frame(self, frame, priority, order=None):
+        if order is None:
+            order = next(self._send_order)
+        self._loop.call_soon_threadsafe(self._outgoing.put_nowait, (priority, order, frame, time.perf_counter()))
+        return order
+
+    async def _sender(self):
+        while True:
+            priority, order, frame, queued_at = await self._outgoing.get()
+            if frame is None:
+                break
+            if priority == SEND_PRIORITY_MOVE and not self._coalescer.should_send(order):
+                continue
+            if priority == SEND_PRIORITY_PING and not self._take_ping():
+                continue  # Already sent ahead of its turn
+            if priority != SEND_PRIORITY_PING and self._take_ping(overdue_only=True):
+                await self._transport.send("2")
+            await self._transport.send(frame)
+            self._frame_sent(priority, queued_at)
+        self._writing = False
+        for task in self._tasks:
+            if task is not asyncio.current_task():
+                task.cancel()
+        await self._transport.close()
+
+    async def _heartbeat(self):
+        try:
+            await asyncio.wait_for(self._handshake_done.wait(), PING_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        while self._writing:
+            self._queue_ping()
+            await asyncio.sleep(self.ping_interval)
+
+    def send_forcestart(self, delay=20):
+        asyncio.run_coroutine_threadsafe(self._send_forcestart_after(delay), self._loop)
+
+    async def _send_forcestart_after(self, delay):
+        await asyncio.sleep(delay)
+        self._send(["set_force_start", self._gameid, True])
+        logging.info("Sent force start")
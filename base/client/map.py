@@ -5,13 +5,64 @@
 """
 
 import logging
-from collections import deque
-import time
+from array import array
+import random
 from typing import List
 
+from .border import BorderIndex
+from .candidates import TargetCandidates
+from .captures import CaptureTable
 from .constants import *
+from .distances import DistanceFields
+from .exploration import ExplorationFrontier
+from .flow import FlowFields
+from .ownership import ArmyIndex, OwnedTiles
+from .pathfinding import PathFinder
+from .pending import PendingMoves
+from .search import SearchKernel
+from .swamps import SwampRegions
 from .tile import Tile
-from .TargetTracker import TargetTracker
+
+
+# tile_flags byte -> 1 for a tile I have held that is not a mountain or obstacle, see Map.attack_candidates
+_HELD_TABLE = bytes(1 if flags & FLAG_HELD and not flags & (FLAG_MOUNTAIN | FLAG_OBSTACLE) else 0
+                    for flags in range(256))
+
+
+class TileChanges(object):
+    """
+    The tile_id of each tile updated since its subscriber last emptied it (see Map._subscribe_tile_updates), once
+    each, in the order first updated. Kept in a byte mask and an array of ids, so a subscriber that falls behind
+    holds at most 5 bytes per tile.
+    """
+    __slots__ = ('_mask', '_ids')
+
+    def __init__(self, size):
+        self._mask = bytearray(size)  # 1 for each tile_id in _ids
+        self._ids = array('i')
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def add(self, tile_id):
+        if not self._mask[tile_id]:
+            self._mask[tile_id] = 1
+            self._ids.append(tile_id)
+
+    def update(self, tile_ids):
+        for tile_id in tile_ids:
+            self.add(tile_id)
+
+    def add_all(self):
+        self._mask = bytearray(b"\x01") * len(self._mask)
+        self._ids = array('i', range(len(self._mask)))
+
+    def clear(self):
+        self._mask = bytearray(len(self._mask))
+        self._ids = array('i')
 
 
 class Map(object):
@@ -28,12 +79,24 @@ class Map(object):
         self._apply_update_diff(data)
         self.rows = self.rows  # Integer Number Grid Rows
         self.cols = self.cols  # Integer Number Grid Cols
+        self.terrain_version = 0  # Integer, incremented whenever a tile becomes (or stops being) walkable
         self.grid = [[Tile(self, x, y) for x in range(self.cols)] for y in range(self.rows)]  # 2D List of Tile Objects
+        self.flat_grid = [tile for row in self.grid for tile in row]  # List of Tile Objects, indexed by tile_id
+        self.tile_flags = bytearray(self.rows * self.cols)  # FLAG_* bits of each tile, kept up to date by Tile
+        self.tile_types = array('b', [TILE_FOG]) * (self.rows * self.cols)  # Tile.tile of each tile, as tile_flags
+        self.state_version = 0  # Integer, incremented whenever any tile is updated
+        self._tile_listeners = []  # TileChanges that collect the tile_id of every updated tile
+        self._attack_candidates = ([], None)
+        self._target_table = (None, None)  # (bytes.translate table of the tile types attack_candidates may target, key)
         self._set_neighbors()
+        self.exploration = ExplorationFrontier(self)  # Unexplored obstacles by distance from my territory
+        self.exploration_targets = self.exploration.targets
+        self._set_indexes()
+        self.pending_moves = PendingMoves(self)  # Moves sent but not yet executed, see Tile.is_dirty
         self.swamps = [(c // self.cols, c % self.cols) for c in start_data['swamps']]  # List [(y,x)] of swamps
         self._set_swamps()
         self.turn = data['turn']  # Integer Turn # (1 turn / 0.5 seconds)
-        self.tiles = [[] for x in range(12)]  # List of 8 (+ extra) Players Tiles
+        self.tiles = [OwnedTiles() for x in range(12)]  # List of 8 (+ extra) Players Tiles
         self.cities = []  # List of City Tiles
         self.generals = [None for x in range(12)]  # List of 8 (+ extra) Generals (None if not found)
         self._set_generals()
@@ -41,7 +104,6 @@ class Map(object):
         self.scores = self._get_scores(data)  # List of Player Scores
         self.complete = False  # Boolean Game Complete
         self.result = False  # Boolean Game Result (True = Won)
-        self.exploration_targets = TargetTracker()
 
         # Public/Shared Components
         self.path = []
@@ -61,13 +123,16 @@ class Map(object):
         self.scores = self._get_scores(data)
         self.turn = data['turn']
 
-        for x in range(self.cols):  # Update Each Tile
-            for y in range(self.rows):
-                tile_type = self._tile_grid[y][x]
-                army_count = self._army_grid[y][x]
-                is_city = (y, x) in self._visible_cities
-                is_general = (y, x) in self._visible_generals
-                self.grid[y][x].update(self, tile_type, army_count, is_city, is_general)
+        # Update only the tiles the diff changed (or the bot touched), in the same column-major order as a full scan
+        changed = sorted(self._pending_updates, key=lambda c: (c % self.cols) * self.rows + c // self.cols)
+        for i in changed:
+            self.grid[i // self.cols][i % self.cols].update(self, self.terrain_array[i], self.army_array[i],
+                                                            self.city_mask[i] == 1, self.general_mask[i] == 1)
+        self._pending_updates.clear()
+
+        for tile in self.tiles[self.player_index]:  # Unchanged tiles that I own are still held this turn
+            tile.turn_held = self.turn
+        self.flow.release()  # Last turn's fields are out of date, rather than kept until the next is asked for
 
         return self
 
@@ -76,19 +141,59 @@ class Map(object):
         self.result = result == "game_won"
         return self
 
+    def clone(self):
+        """
+        An independent copy of this map, with everything remembered so far: every tile (fog memory, turn_held,
+        ...), the flat arrays, each player's tiles, cities, generals, the pending moves and the exploration
+        targets (which remember when they were found). The indexes derived from the tiles alone (distances, flow,
+        candidates, border, captures, armies) start out empty on the copy and are rebuilt as they are used.
+        :return: the copy, updated like any Map from then on
+        """
+        game_map = Map.__new__(Map)
+        game_map.__dict__.update(self.__dict__)  # Then replace everything the copy must not share
+        grid = [tile.copy(game_map) for tile in self.flat_grid]
+        for tile in grid:
+            tile._neighbors = tuple(grid[neighbor.tile_id] for neighbor in tile._neighbors)
+        game_map.flat_grid = grid
+        game_map.grid = [grid[y * self.cols:(y + 1) * self.cols] for y in range(self.rows)]
+        for name in ('army_array', 'terrain_array', 'city_mask', 'general_mask', 'swamp_mask', 'tile_flags',
+                     'tile_types', '_cities_private', '_generals_private', 'stars', 'do_not_attack_players'):
+            setattr(game_map, name, getattr(self, name)[:])
+        game_map._pending_updates = set(self._pending_updates)
+        game_map.tiles = [OwnedTiles() for _ in self.tiles]
+        for owned, tiles in zip(game_map.tiles, self.tiles):
+            for tile in tiles:
+                owned.append(grid[tile.tile_id])
+        game_map.cities = [grid[tile.tile_id] for tile in self.cities]
+        game_map.generals = [None if tile is None else grid[tile.tile_id] for tile in self.generals]
+        game_map.path = [grid[tile.tile_id] for tile in self.path]
+        game_map.collect_path = [grid[tile.tile_id] for tile in self.collect_path]
+
+        game_map._tile_listeners = []
+        game_map._attack_candidates = ([], None)
+        game_map.search = SearchKernel(game_map)
+        game_map.paths = PathFinder(game_map)
+        game_map._set_indexes()
+        for listener in game_map._tile_listeners:  # As after the first update: every tile is new to the indexes
+            listener.add_all()
+        game_map.exploration = self.exploration.copy(game_map)
+        game_map.exploration_targets = game_map.exploration.targets
+        game_map.pending_moves = self.pending_moves.copy(game_map)
+        game_map.swamp_regions = SwampRegions(game_map)
+        return game_map
+
     # ======================== Map Search/Selection ======================== #
 
     def find_city(self, of_type=None, not_of_type=None, not_in_path=None, find_largest=True, include_general=False):
         # ofType = Integer, notOfType = Integer, notInPath = [Tile], findLargest = Boolean
-        if not_in_path is None:
-            not_in_path = []
+        not_in_path = {tile.tile_id for tile in not_in_path if tile is not None} if not_in_path else set()
         if of_type is None and not_of_type is None:
             of_type = self.player_index
 
         found_city = None
         for city in self.cities:  # Check Each City
             if city.tile == of_type or (not_of_type is not None and city.tile != not_of_type):
-                if city in not_in_path:
+                if city.tile_id in not_in_path:
                     continue
                 if found_city is None:
                     found_city = city
@@ -122,8 +227,8 @@ class Map(object):
         :return: The tile belonging to player of_type with the most armies
         """
         # ofType = Integer, notInPath = [Tile], includeGeneral = False|True|Int Acceptable Largest|0.1->0.9 Ratio
-        if tiles_to_exclude is None:
-            tiles_to_exclude = []
+        tiles_to_exclude = {tile.tile_id for tile in tiles_to_exclude if tile is not None} \
+            if tiles_to_exclude else set()
         if of_type is None:
             of_type = self.player_index
         general = self.generals[of_type]
@@ -131,13 +236,12 @@ class Map(object):
             logging.error("ERROR: find_largest_tile encountered general=None for player %d with list %s" % (
                 of_type, self.generals))
 
-        largest = None
-        for tile in self.tiles[of_type]:  # Check each ofType tile
-            if largest is None or largest.army < tile.army:  # New largest
-                if not tile.is_general and tile not in tiles_to_exclude:  # Exclude general and path
-                    largest = tile
+        # Largest ofType tile, excluding general and path (ties go to the highest tile_id)
+        found = self.army_index.largest(of_type, exclude=tiles_to_exclude)
+        largest = found[0] if found else None
 
-        if include_general > 0 and general is not None and general not in tiles_to_exclude:  # Handle includeGeneral
+        # Handle includeGeneral
+        if include_general > 0 and general is not None and general.tile_id not in tiles_to_exclude:
             if include_general < 1:
                 include_general = general.army * include_general
                 if include_general < 6:
@@ -168,72 +272,78 @@ class Map(object):
         largest = self.find_largest_tile(include_general=True)
         max_target_size = largest.army * 1.25
 
-        for x in _shuffle(range(self.cols)):  # Check Each Tile
-            for y in _shuffle(range(self.rows)):
-                source = self.grid[y][x]
-                if not source.is_valid_target() or source.tile == self.player_index:  # Don't target invalid tiles
-                    continue
-
-                if target_type <= OPP_GENERAL:  # Search for Generals
-                    if source.tile >= 0 and source.is_general and source.army < max_target_size:
-                        return source
-
-                if target_type <= OPP_CITY:  # Search for Smallest Cities
-                    if source.is_city and source.army < max_target_size:
-                        if target_type < OPP_CITY or source.army < target.army:
-                            target = source
-                            target_type = OPP_CITY
-
-                if target_type <= OPP_ARMY:  # Search for Largest Opponent Armies
-                    if source.tile >= 0 and (target is None or source.army > target.army) and not source.is_city:
-                        target = source
-                        target_type = OPP_ARMY
-
-                if target_type < OPP_EMPTY:  # Search for Empty Squares
-                    if source.tile == TILE_EMPTY and source.army < largest.army:
-                        target = source
-                        target_type = OPP_EMPTY
+        # Valid targets not owned by me, by type (ties are broken randomly)
+        candidates = self.target_candidates
+        if target_type <= OPP_GENERAL:  # Search for Generals
+            generals = candidates.below(OPP_GENERAL, max_target_size)
+            if generals:
+                return generals[0]
+
+        if target_type <= OPP_CITY:  # Search for Smallest Cities
+            city = candidates.smallest(OPP_CITY, max_target_size)
+            if city is not None and (target_type < OPP_CITY or city.army < target.army):
+                return city
+            if target_type == OPP_CITY:
+                return target
+
+        if target_type <= OPP_ARMY:  # Search for Largest Opponent Armies
+            army = candidates.largest(OPP_ARMY)
+            if army is not None and (target is None or army.army > target.army):
+                return army
+            if target_type == OPP_ARMY:
+                return target
+
+        if target_type < OPP_EMPTY:  # Search for Empty Squares
+            empties = candidates.below(OPP_EMPTY, largest.army)
+            if empties:
+                return empties[0]
 
         return target
 
-    def find_exploration_targets(self):
-        print("find exploration start: time %s, turn %s" % (time.time(), self.turn))
-        obstacles = []
-        fog = []
-        bfs_queue: deque[Tile] = deque(self.tiles[self.player_index])
-        processed = set()
-
-        while bfs_queue:
-            current = bfs_queue.popleft()
-            if current in processed:
-                continue
-            if current.tile == TILE_OBSTACLE and not current.is_city and not current.is_mountain:
-                obstacles.append(current)
-            elif current.tile == TILE_FOG and not current.is_general and not current.is_basic:
-                fog.append(current)
-            processed.add(current)
-            for neighbor in current.neighbors(True, True, True):
-                if not neighbor.is_mountain:
-                    bfs_queue.append(neighbor)
-
-        print(obstacles)
-        obstacles.reverse()
-        fog.reverse()
-        self.exploration_targets.update_list(obstacles, self.turn)
-        print("find exploration end: time %s, turn %s" % (time.time(), self.turn))
-
     def get_exploration_target(self):
-        target = self.exploration_targets.get_target(self.turn)
-        if target is None:
-            self.find_exploration_targets()
-            target = self.exploration_targets.get_target(self.turn)
-        return target
+        return self.exploration.nearest()
 
+    def attack_candidates(self):
+        """
+        Tile ids of every tile passing Tile.should_attack (apart from the is_dirty check), in column-major order.
+        Computed as whole-grid masks, one byte per tile: tile_flags and tile_types are turned into masks by
+        bytes.translate, the masks are combined as ints, and the tiles next to held tiles are found by shifting
+        the held mask one column or one row. Cached until a tile changes.
+        """
+        key = (self.state_version, tuple(self.do_not_attack_players))
+        if self._attack_candidates[1] == key:
+            return self._attack_candidates[0]
+        size, rows, cols = self.rows * self.cols, self.rows, self.cols
+
+        # Tiles next to a tile I have held (is_valid_target ignores mountain and obstacle neighbors)
+        held = int.from_bytes(self.tile_flags.translate(_HELD_TABLE), 'little')
+        not_first_column, not_last_column = self._column_masks
+        reachable = (held << 8 & not_first_column) | (held >> 8 & not_last_column) | held << 8 * cols | held >> 8 * cols
+
+        # Visible, not on my team and not on the do not attack list
+        if self._target_table[1] != key[1]:
+            excluded = {TILE_MOUNTAIN, TILE_FOG, TILE_OBSTACLE}
+            excluded.update(self.my_team)
+            excluded.update(self.do_not_attack_players)
+            self._target_table = (bytes(0 if (b - 256 if b > 127 else b) in excluded else 1 for b in range(256)),
+                                  key[1])
+        targetable = int.from_bytes(self.tile_types.tobytes().translate(self._target_table[0]), 'little')
+
+        mask = (reachable & targetable).to_bytes(size, 'little')
+        by_column = b"".join(mask[column::cols] for column in range(cols))
+        candidates = []
+        i = by_column.find(1)
+        while i != -1:
+            candidates.append((i % rows) * cols + i // rows)
+            i = by_column.find(1, i + 1)
+
+        self._attack_candidates = (candidates, key)
+        return candidates
 
     # ======================== Validators ======================== #
 
     def is_valid_position(self, x, y):
-        return 0 <= y < self.rows and 0 <= x < self.cols and self._tile_grid[y][x] != TILE_MOUNTAIN
+        return 0 <= y < self.rows and 0 <= x < self.cols and self.terrain_array[y * self.cols + x] != TILE_MOUNTAIN
 
     def can_complete_path(self, path):
         if len(path) < 2:
@@ -279,50 +389,94 @@ class Map(object):
         return scores
 
     def _apply_update_diff(self, data):
-        print_cities = data['turn'] % 30 == 0
-        if '_map_private' not in dir(self):
-            self._map_private = []
-            self._cities_private = []
-        # if print_cities:
-        #     print("Turn", data['turn'])
-        #     print(self._cities_private)
-        #     print(data['cities_diff'])
-        _apply_diff(self._map_private, data['map_diff'])
-        _apply_diff(self._cities_private, data['cities_diff'])
-        # if print_cities:
-        #     print(self._cities_private)
-        #     print("\n")
-
-        # Get Number Rows + Columns
-        self.rows, self.cols = self._map_private[1], self._map_private[0]
-
-        # Create Updated Tile Grid
-        self._tile_grid = [[self._map_private[2 + self.cols * self.rows + y * self.cols + x] for x in range(self.cols)]
-                           for y in range(self.rows)]
-        # Create Updated Army Grid
-        self._army_grid = [[self._map_private[2 + y * self.cols + x] for x in range(self.cols)] for y in
-                           range(self.rows)]
+        if 'army_array' not in dir(self):
+            self._init_arrays(data)
+        else:
+            _apply_map_diff(self.army_array, self.terrain_array, data['map_diff'], self._pending_updates)
 
         # Update Visible Cities
-        self._visible_cities = [(c // self.cols, c % self.cols) for c in self._cities_private]  # returns [(y,x)]
+        previous_cities = set(self._cities_private)
+        _apply_diff(self._cities_private, data['cities_diff'])
+        _update_mask(self.city_mask, previous_cities, set(self._cities_private), self._pending_updates)
 
         # Update Visible Generals
-        self._visible_generals = [(-1, -1) if g == -1 else (g // self.cols, g % self.cols) for g in
-                                  data['generals']]  # returns [(y,x)]
+        previous_generals = set(self._generals_private)
+        self._generals_private = data['generals']  # List of tile indices (-1 if not visible)
+        _update_mask(self.general_mask, previous_generals, set(self._generals_private), self._pending_updates)
+
+    def _init_arrays(self, data):
+        """
+        Allocate the flat board arrays from the first update. Every later update is patched into these
+        arrays in place, so the board is never rebuilt. Index i of each array is the tile at
+        (y, x) = divmod(i, cols).
+        """
+        board = []
+        _apply_diff(board, data['map_diff'])
+
+        # Get Number Rows + Columns
+        self.cols, self.rows = board[0], board[1]
+        size = self.rows * self.cols
+
+        self.army_array = array('i', board[2:2 + size])  # Visible army count of each tile
+        self.terrain_array = array('i', board[2 + size:2 + 2 * size])  # Visible tile type of each tile
+        self.city_mask = array('b', bytes(size))  # 1 if tile is a visible city
+        self.general_mask = array('b', bytes(size))  # 1 if tile is a visible general
+        self.swamp_mask = array('b', bytes(size))  # 1 if tile is a swamp
+        self._cities_private = []
+        self._generals_private = []
+        self._pending_updates = set(range(size))  # Tile indices to run through Tile.update on the next update
+
+    def _tile_updated(self, tile):
+        # Tile may have been changed outside of a server update (ex: dirtied by a move), so resync it next update
+        self._pending_updates.add(tile.tile_id)
+        self.state_version += 1
+        tile_id = tile.tile_id
+        for listener in self._tile_listeners:
+            if not listener._mask[tile_id]:  # Inlined TileChanges.add, this runs per listener for every tile update
+                listener._mask[tile_id] = 1
+                listener._ids.append(tile_id)
+
+    def _subscribe_tile_updates(self):
+        """
+        :return: TileChanges that the tile_id of every updated tile is added to. The subscriber empties it.
+        """
+        listener = TileChanges(self.rows * self.cols)
+        self._tile_listeners.append(listener)
+        return listener
 
     def _set_neighbors(self):
         for x in range(self.cols):
             for y in range(self.rows):
                 self.grid[y][x].set_neighbors(self)
 
+        # Tile id adjacency: adjacency[i] is the tuple of tile ids next to tile i (mountains at game start excluded)
+        self.adjacency = [tuple(neighbor.tile_id for neighbor in tile._neighbors) for tile in self.flat_grid]
+        # Byte masks of the tiles not in the first and not in the last column, see attack_candidates
+        size = self.rows * self.cols
+        self._column_masks = (int.from_bytes(bytes(1 if i % self.cols else 0 for i in range(size)), 'little'),
+                              int.from_bytes(bytes(1 if i % self.cols != self.cols - 1 else 0 for i in range(size)),
+                                             'little'))
+        self.search = SearchKernel(self)
+        self.paths = PathFinder(self)
+
+    def _set_indexes(self):
+        self.distances = DistanceFields(self)  # Walking distance fields, see DistanceFields.field
+        self.flow = FlowFields(self)  # Per-turn distance fields toward my largest army and Map.path
+        self.target_candidates = TargetCandidates(self)  # Primary target candidates by opponent type
+        self.border = BorderIndex(self)  # My tiles next to tiles I could move into
+        self.capture_table = CaptureTable(self)  # Generals and cities my neighboring armies could capture
+        self.army_index = ArmyIndex(self)  # Each player's tiles by army, see find_largest_tile
+
     def _set_swamps(self):
         for (y, x) in self.swamps:
+            self.swamp_mask[y * self.cols + x] = 1
             self.grid[y][x].set_is_swamp(True)
+        self.swamp_regions = SwampRegions(self)  # Swamp regions and the routes out of them, see SwampRegions
 
     def _set_generals(self):
-        for i, general in enumerate(self._visible_generals):
-            if general[0] != -1:
-                self.generals[i] = self.grid[general[0]][general[1]]
+        for i, general in enumerate(self._generals_private):
+            if general != -1:
+                self.generals[i] = self.grid[general // self.cols][general % self.cols]
 
     def _get_my_team(self, team_list):
         return [
@@ -367,7 +521,44 @@ def _apply_diff(cache, diff):
     assert i == len(diff)
 
 
-def _shuffle(seq):
-    shuffled = list(seq)
-    random.shuffle(shuffled)
-    return iter(shuffled)
+def _apply_map_diff(army_array, terrain_array, diff, changed):
+    """
+    Apply a map_diff (same format as _apply_diff) directly onto the flat army and terrain arrays.
+    The map array described by the diff is [cols, rows, army..., terrain...]; the size never changes
+    during a game, so the two leading entries and any trailing u{k+1} are skipped.
+    :param army_array: flat army array, modified in place
+    :param terrain_array: flat terrain array, modified in place
+    :param diff: the map_diff from the server
+    :param changed: set that the index of every tile whose army or terrain changed is added to
+    :return:
+    """
+    size = len(army_array)
+    i = 0  # the current index of the diff array
+    a = -2  # the current tile index (the map array starts with cols and rows)
+    while i < len(diff) - 1:
+        a += diff[i]
+        n = diff[i + 1]
+        for j in range(i + 2, i + 2 + n):
+            if a >= size:
+                if terrain_array[a - size] != diff[j]:
+                    terrain_array[a - size] = diff[j]
+                    changed.add(a - size)
+            elif a >= 0:
+                if army_array[a] != diff[j]:
+                    army_array[a] = diff[j]
+                    changed.add(a)
+            a += 1
+        i += n + 2
+
+
+def _update_mask(mask, previous, current, changed):
+    # Set mask to the tile indices in current (ignoring -1), recording every tile that flipped in changed
+    for c in previous - current:
+        if c != -1:
+            mask[c] = 0
+            changed.add(c)
+    for c in current - previous:
+        if c != -1:
+            mask[c] = 1
+            changed.add(c)
+
@@ -0,0 +1,64 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Move Queue: Local copy of the moves queued on the server
+"""
+
+from collections import deque, namedtuple
+
+QueuedMove = namedtuple('QueuedMove', ['move_id', 'source', 'dest', 'move_half'])  # source, dest are tile ids
+
+
+class MoveQueue(object):
+    """
+    The server keeps a queue of the attacks sent to it and executes one per turn, so advance pops one move per
+    turn elapsed. check then compares the map with the plan, and reports the plan broken when a move did not
+    take its destination (ex: a capture fell short) or the next move starts from a tile I do not hold: the
+    server skips moves from tiles I cannot move out of, so from then on its queue and the local one disagree.
+    Not thread safe: Generals holds its moves lock around every call.
+    """
+    def __init__(self):
+        self._moves = deque()
+        self.executed = []  # Moves the server should have executed on the last update
+
+    def __len__(self):
+        return len(self._moves)
+
+    def __iter__(self):
+        return iter(self._moves)
+
+    def push(self, move_id, source, dest, move_half=False):
+        self._moves.append(QueuedMove(move_id, source, dest, move_half))
+
+    def remove(self, move_id):
+        for move in self._moves:
+            if move.move_id == move_id:
+                self._moves.remove(move)
+                return
+
+    def clear(self):
+        """
+        :return: List of the moves that were queued
+        """
+        dropped = list(self._moves)
+        self._moves.clear()
+        return dropped
+
+    def advance(self, turns):
+        """
+        Pop the moves the server executed over turns turns
+        """
+        self.executed = [self._moves.popleft() for _ in range(min(turns, len(self._moves)))]
+
+    def check(self, game_map):
+        """
+        Compare the map after an update with the moves executed for it
+        :return: True if every executed move left me holding its destination, and the next queued move starts
+            from a tile I hold
+        """
+        for move in self.executed:
+            if game_map.tile_types[move.dest] != game_map.player_index:
+                return False
+        if self._moves:
+            source = self._moves[0].source
+            return game_map.tile_types[source] == game_map.player_index
+        return True
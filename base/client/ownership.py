@@ -0,0 +1,140 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Ownership: Each player's tiles, with O(1) transfer and queries by army size
+"""
+
+from array import array
+
+
+class OwnedTiles(list):
+    """
+    One player's Tiles (Map.tiles[player]). Appending and removing a tile are O(1): remove moves the last tile
+    into the gap, so the list is not kept in capture order.
+    """
+    def __init__(self):
+        list.__init__(self)
+        self._positions = {}  # tile_id -> index in this list
+
+    def __contains__(self, tile):
+        return tile is not None and tile.tile_id in self._positions
+
+    def append(self, tile):
+        self._positions[tile.tile_id] = len(self)
+        list.append(self, tile)
+
+    def remove(self, tile):
+        index = self._positions.pop(tile.tile_id, None)
+        if index is None:
+            raise ValueError("OwnedTiles.remove(tile): tile not owned")
+        last = list.pop(self)
+        if index < len(self):
+            self[index] = last
+            self._positions[last.tile_id] = index
+
+
+class SortedArmies(object):
+    """
+    (army, tile_id) pairs kept sorted, in two flat arrays. Armies are stored as doubles: they are exact for any
+    army count, and a bot may scale a tile's army down to a fraction (ex: bot_path_collect's old targets).
+    """
+    __slots__ = ('armies', 'tile_ids')
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self.armies = array('d', [army for army, _ in pairs])
+        self.tile_ids = array('i', [tile_id for _, tile_id in pairs])
+
+    def __len__(self):
+        return len(self.tile_ids)
+
+    def insert(self, army, tile_id):
+        i = self._index(army, tile_id)
+        self.armies.insert(i, army)
+        self.tile_ids.insert(i, tile_id)
+
+    def remove(self, army, tile_id):
+        i = self._index(army, tile_id)
+        del self.armies[i]
+        del self.tile_ids[i]
+
+    def _index(self, army, tile_id):
+        # bisect_left of (army, tile_id)
+        armies, tile_ids = self.armies, self.tile_ids
+        low, high = 0, len(tile_ids)
+        while low < high:
+            middle = (low + high) // 2
+            if armies[middle] < army or (armies[middle] == army and tile_ids[middle] < tile_id):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class ArmyIndex(object):
+    """
+    Each player's tiles as SortedArmies (by army, then tile_id), brought up to date from the tiles updated since
+    the last query. When most of a player's tiles changed (ex: every tile grows on turn 25) they are rebuilt by
+    sorting instead.
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        self._pending = game_map._subscribe_tile_updates()
+        self._size = game_map.rows * game_map.cols
+        self._players = {}  # player index -> SortedArmies of the player's tiles
+        self._entry_player = array('b', [-1]) * self._size  # Player index of each tile_id's entry (-1 for none)
+        self._entry_army = array('d', bytes(8 * self._size))  # Army of each tile_id's entry
+
+    def largest(self, player, count=1, exclude=(), include_general=False):
+        """
+        :param exclude: collection of tile_ids to skip
+        :param include_general: if False, skip generals
+        :return: List of up to count of player's Tiles with the most armies, largest first (ties by highest tile_id)
+        """
+        self._refresh()
+        grid = self._map.flat_grid
+        found = []
+        entries = self._players.get(player)
+        for tile_id in reversed(entries.tile_ids if entries is not None else ()):
+            if tile_id in exclude or (not include_general and grid[tile_id].is_general):
+                continue
+            found.append(grid[tile_id])
+            if len(found) == count:
+                break
+        return found
+
+    # ======================== Maintenance ======================== #
+
+    def _refresh(self):
+        if not self._pending:
+            return
+        grid, entry_player, entry_army = self._map.flat_grid, self._entry_player, self._entry_army
+        changed = []
+        for tile_id in self._pending:
+            tile = grid[tile_id]
+            if tile.tile >= 0:
+                if entry_player[tile_id] != tile.tile or entry_army[tile_id] != tile.army:
+                    changed.append(tile_id)
+            elif entry_player[tile_id] != -1:
+                changed.append(tile_id)
+        self._pending.clear()
+        if len(changed) > sum(len(entries) for entries in self._players.values()) // 4:
+            self._rebuild()
+            return
+
+        for tile_id in changed:
+            tile = grid[tile_id]
+            if entry_player[tile_id] != -1:  # Remove old entry
+                self._players[entry_player[tile_id]].remove(entry_army[tile_id], tile_id)
+                entry_player[tile_id] = -1
+            if tile.tile >= 0:
+                self._players.setdefault(tile.tile, SortedArmies()).insert(tile.army, tile_id)
+                entry_player[tile_id], entry_army[tile_id] = tile.tile, tile.army
+
+    def _rebuild(self):
+        self._players = {}
+        self._entry_player = array('b', [-1]) * self._size
+        for player, tiles in enumerate(self._map.tiles):
+            if tiles:
+                self._players[player] = SortedArmies((tile.army, tile.tile_id) for tile in tiles)
+                for tile in tiles:
+                    self._entry_player[tile.tile_id], self._entry_army[tile.tile_id] = player, tile.army
@@ -0,0 +1,110 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Pathfinding: Army-aware path search used by Tile.path_to
+"""
+
+from .constants import *
+from .search import exclude_flags, finish
+
+
+class PathFinder(object):
+    """
+    Path searches for one map, run in the Map's SearchKernel buffers (no buffers of its own).
+
+    Army search: breadth first from the source, with the queue in the kernel's preallocated buffer. A tile may be
+    entered if it is on my team, is the destination, or holds fewer armies than would arrive there, and the armies
+    left on arrival are relaxed whenever a better route to a found tile that has not been expanded yet turns up.
+    This is the search Tile.path_to always ran (label correcting, in FIFO order), so the paths are the same: a
+    search ordered by armies (heap) or by distance to dest (A*) would pick different routes among equal ones.
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        self.max_expansions = None  # Node expansion budget for each call, shared by its passes (None for unlimited)
+        self.expansions = 0  # Nodes expanded by the last call
+        self.budget_exhausted = False  # Whether the last call stopped because it ran out of budget
+
+    def army_path(self, source, dest, include_cities=False, include_obstacles=False):
+        """
+        Path used by Tile.path_to. If no path avoids cities, the search is repeated allowing cities
+        (and excluding obstacles).
+        :return: List of Tiles from source to dest, or [] if not found
+        """
+        return finish(self.army_path_steps(source, dest, include_cities, include_obstacles))
+
+    def army_path_steps(self, source, dest, include_cities=False, include_obstacles=False):
+        """
+        army_path as an anytime search: yields None after every SEARCH_CHUNK tiles expanded (see
+        SearchKernel.bfs_steps), and returns army_path's result
+        """
+        self.expansions = 0
+        self.budget_exhausted = False
+        exclude = exclude_flags(include_swamps=True, include_cities=include_cities,
+                                include_obstacles=include_obstacles)
+        if (yield from self._army_search(source.tile_id, dest.tile_id, exclude)):
+            return self._map.search.path(dest.tile_id)
+        if include_cities or self.budget_exhausted:
+            return []
+
+        if (yield from self._army_search(source.tile_id, dest.tile_id, exclude_flags(include_swamps=True))):
+            return self._map.search.path(dest.tile_id)
+        return []
+
+    # ======================== PRIVATE FUNCTIONS ======================== #
+
+    def _army_search(self, source, dest, exclude):
+        """
+        Generator yielding None after every SEARCH_CHUNK tiles expanded
+        :return: whether dest was reached (possibly by a route a larger budget would have improved on). The route
+            is left in the kernel's parent buffer.
+        """
+        search = self._map.search
+        generation = search.begin()
+        seen, done, parent, value, queue = search.seen, search.done, search.parent, search.value, search.queue
+        adjacency, flags = self._map.adjacency, self._map.tile_flags
+        grid = self._map.flat_grid
+        budget = self.max_expansions
+
+        seen[source] = generation
+        parent[source] = -1
+        value[source] = grid[source].army
+        queue[0] = source
+        head, tail = 0, 1
+        chunk_left = SEARCH_CHUNK
+
+        while head < tail:
+            current = queue[head]
+            if current == dest:  # Found Destination
+                break
+            if budget is not None and self.expansions >= budget:
+                self.budget_exhausted = True
+                break
+            chunk_left -= 1
+            if not chunk_left:
+                yield
+                search.check(generation)
+                chunk_left = SEARCH_CHUNK
+            self.expansions += 1
+            head += 1
+
+            army = value[current]
+            for neighbor in adjacency[current]:
+                if done[neighbor] == generation or flags[neighbor] & exclude:
+                    continue
+                tile = grid[neighbor]
+                on_team = flags[neighbor] & FLAG_TEAM
+                if on_team or neighbor == dest or tile.army < army:
+                    if on_team:
+                        next_army = army + (tile.army - 1)
+                    else:
+                        next_army = army - (tile.army + 1)
+                    if seen[neighbor] != generation:
+                        seen[neighbor] = generation
+                        queue[tail] = neighbor
+                        tail += 1
+                    elif next_army <= value[neighbor]:
+                        continue
+                    value[neighbor] = next_army
+                    parent[neighbor] = current
+            done[current] = generation
+
+        return seen[dest] == generation
@@ -0,0 +1,91 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Pending Moves: Moves sent to the server that have not been executed yet
+"""
+
+
+class PendingMoves(object):
+    """
+    A light layer over the map for the moves in flight, keyed by move_id. The tiles they attack are counted in a
+    byte mask (Tile.is_dirty is a lookup into it), and the owner and army each move is expected to leave behind
+    are kept here instead of being written into the Tiles, which only ever hold what the server sent.
+    Moves are dropped once the server has executed them or they were cleared from its queue (see sync).
+    Not thread safe: Generals holds its moves lock around every change.
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        self.mask = bytearray(game_map.rows * game_map.cols)  # Number of pending moves into each tile_id
+        self._moves = {}  # move_id -> (source tile id, dest tile id, move_half), in the order sent
+        self._predicted = {}  # tile_id -> (owner, army) expected once the pending moves are executed
+
+    def __len__(self):
+        return len(self._moves)
+
+    def __contains__(self, move_id):
+        return move_id in self._moves
+
+    def copy(self, game_map):
+        """
+        :return: a copy of these pending moves on game_map, a clone of this map (see Map.clone)
+        """
+        pending = PendingMoves(game_map)
+        pending.mask[:] = self.mask
+        pending._moves = dict(self._moves)
+        pending._predicted = dict(self._predicted)
+        return pending
+
+    def add(self, move_id, source, dest, move_half=False):
+        self._moves[move_id] = (source, dest, move_half)
+        self.mask[dest] += 1
+        self._predict(source, dest, move_half)
+
+    def sync(self, move_ids):
+        """
+        Drop every move not in move_ids (the moves still queued on the server)
+        """
+        self._drop([move_id for move_id in list(self._moves) if move_id not in move_ids])
+
+    def remove(self, move_id):
+        if move_id in self._moves:
+            self._drop([move_id])
+
+    def owner(self, tile_id):
+        """
+        :return: tile type (player index, TILE_EMPTY, ...) of tile_id once the pending moves are executed
+        """
+        predicted = self._predicted.get(tile_id)
+        return predicted[0] if predicted is not None else self._map.tile_types[tile_id]
+
+    def army(self, tile_id):
+        """
+        :return: army of tile_id once the pending moves are executed
+        """
+        predicted = self._predicted.get(tile_id)
+        return predicted[1] if predicted is not None else self._map.flat_grid[tile_id].army
+
+    # ======================== PRIVATE FUNCTIONS ======================== #
+
+    def _drop(self, move_ids):
+        if not move_ids:
+            return
+        for move_id in move_ids:
+            source, dest, move_half = self._moves.pop(move_id)
+            self.mask[dest] -= 1
+        self._predicted = {}
+        for source, dest, move_half in list(self._moves.values()):
+            self._predict(source, dest, move_half)
+
+    def _predict(self, source, dest, move_half):
+        owner, army = self.owner(source), self.army(source)
+        if owner < 0 or army < 2:
+            return
+        moving = army // 2 if move_half else army - 1
+        self._predicted[source] = (owner, army - moving)
+
+        dest_owner, dest_army = self.owner(dest), self.army(dest)
+        if dest_owner == owner or (dest_owner in self._map.my_team and owner in self._map.my_team):
+            self._predicted[dest] = (dest_owner, dest_army + moving)
+        elif moving > dest_army:
+            self._predicted[dest] = (owner, moving - dest_army)
+        else:
+            self._predicted[dest] = (dest_owner, dest_army - moving)
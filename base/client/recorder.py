@@ -0,0 +1,86 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Recorder: Streams the frames of a game to disk as compressed, length-prefixed records
+"""
+
+import logging
+import os
+from queue import Queue
+import struct
+import threading
+import zlib
+
+RECORDING_MAGIC = b"GENREC1\n"
+RECORDING_EXTENSION = ".rec"
+_LENGTH = struct.Struct(">I")
+
+
+class GameRecorder(object):
+    """
+    Appends each frame given to record to a file as it arrives. The file is RECORDING_MAGIC followed by records
+    of a 4 byte big-endian length and that many bytes of one zlib stream, flushed (Z_SYNC_FLUSH) at the end of
+    every record: frames compress against the ones before them, and every complete record can be read back even
+    if the bot crashed mid-game. Compressing and writing happen on a writer thread, so record only queues the
+    frame and the whole game is never held in memory.
+    """
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'wb')
+        self._file.write(RECORDING_MAGIC)
+        self._compressor = zlib.compressobj()
+        self._frames = Queue()  # Frames to write, None closes the file
+        self._writer = threading.Thread(target=self._write_frames)
+        self._writer.daemon = True
+        self._writer.start()
+
+    def record(self, frame):
+        """
+        :param frame: frame received from the server (str)
+        """
+        self._frames.put(frame)
+
+    def close(self, wait=True):
+        self._frames.put(None)
+        if wait:
+            self._writer.join()
+
+    def _write_frames(self):
+        while True:
+            frame = self._frames.get()
+            if frame is None:
+                break
+            chunk = self._compressor.compress(frame.encode()) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._file.write(_LENGTH.pack(len(chunk)) + chunk)
+            self._file.flush()
+        self._file.close()
+        logging.info("Game recorded to %s" % self.path)
+
+
+def read_recording(path):
+    """
+    Frames recorded by GameRecorder, in order. A record cut short (ex: by a crash) ends the recording.
+    :return: Generator of frames (str)
+    """
+    decompressor = zlib.decompressobj()
+    with open(path, 'rb') as file:
+        if file.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+            raise ValueError("%s is not a game recording" % path)
+        while True:
+            header = file.read(_LENGTH.size)
+            if len(header) < _LENGTH.size:
+                return
+            length = _LENGTH.unpack(header)[0]
+            chunk = file.read(length)
+            if len(chunk) < length:
+                return
+            yield decompressor.decompress(chunk).decode()
+
+
+def recording_path(replay_url, directory="games"):
+    file_name = "game_" + replay_url + RECORDING_EXTENSION
+    file_name = file_name.replace("/", ".")
+    file_name = file_name.replace(":", "")
+    return os.path.join(directory, file_name)
@@ -0,0 +1,193 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Search: Reusable BFS kernel over integer tile ids
+"""
+
+from .constants import *
+
+MAX_GENERATION = 2 ** 31 - 1
+
+
+def exclude_flags(include_swamps=False, include_cities=True, include_obstacles=False):
+    """
+    :return: the Map.tile_flags bits that remove a neighbor from a search, matching Tile.neighbors arguments
+    """
+    exclude = FLAG_MOUNTAIN
+    if not include_swamps:
+        exclude |= FLAG_SWAMP
+    if not include_cities:
+        exclude |= FLAG_CITY
+    if not include_obstacles:
+        exclude |= FLAG_OBSTACLE
+    return exclude
+
+
+def finish(steps):
+    """
+    Run an anytime search (a generator yielding None between chunks of work, see SearchKernel.bfs_steps) to the end
+    :return: the search's result
+    """
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        return stop.value
+
+
+class SearchKernel(object):
+    """
+    Scratch buffers for searching a map by tile id, allocated once per map.
+    Each search starts a new generation instead of clearing its buffers: a tile has been seen (or processed)
+    in the current search only if its stamp equals the current generation.
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        self.size = game_map.rows * game_map.cols
+        self.generation = 0
+        # Buffers are plain lists: CPython indexes them faster than array.array, which boxes every read
+        self.seen = [0] * self.size  # Generation in which each tile was discovered
+        self.done = [0] * self.size  # Generation in which each tile was processed
+        self.parent = [-1] * self.size  # Previous tile id on the best route found
+        self.distance = [0] * self.size  # Steps from the sources
+        self.value = [0] * self.size  # Per-search score, ex: armies left on arrival
+        self.queue = [0] * self.size  # FIFO of tile ids, every tile is queued at most once
+
+    def begin(self):
+        """
+        Claim the buffers for a new search
+        :return: the generation stamp of the new search
+        """
+        self.generation += 1
+        if self.generation == MAX_GENERATION:
+            for buffer in (self.seen, self.done):
+                for i in range(self.size):
+                    buffer[i] = 0
+            self.generation = 1
+        return self.generation
+
+    def check(self, generation):
+        """
+        Called by a suspended anytime search when it resumes
+        """
+        if self.generation != generation:
+            raise RuntimeError("Search buffers were claimed by another search while a search was suspended")
+
+    def path(self, dest):
+        """
+        :param dest: a tile id seen by the last search
+        :return: List of Tiles from a search source to dest
+        """
+        grid = self._map.flat_grid
+        path = []
+        current = dest
+        while current != -1:
+            path.append(grid[current])
+            current = self.parent[current]
+        path.reverse()
+        return path
+
+    # ======================== Generic Searches ======================== #
+
+    def bfs(self, sources, exclude, block=0):
+        """
+        Breadth first search from every tile id in sources, skipping tiles with any of the exclude flags.
+        :param block: tiles with any of these flags are found but not searched through, unless they have FLAG_TEAM
+        :return: number of tiles found. queue[:count] holds them in the order found, with distance and parent set.
+        """
+        return finish(self.bfs_steps(sources, exclude, block))
+
+    def bfs_steps(self, sources, exclude, block=0):
+        """
+        bfs as an anytime search: yields None after every SEARCH_CHUNK tiles expanded, so a MoveScheduler routine
+        can be stopped at the deadline, and returns bfs's result. No other search may run on this kernel until it
+        has finished (or been closed).
+        """
+        generation = self.begin()
+        seen, parent, distance, queue = self.seen, self.parent, self.distance, self.queue
+        adjacency, flags = self._map.adjacency, self._map.tile_flags
+
+        tail = 0
+        for source in sources:
+            if seen[source] != generation:
+                seen[source] = generation
+                parent[source] = -1
+                distance[source] = 0
+                queue[tail] = source
+                tail += 1
+        source_count = tail
+
+        head = 0
+        chunk_left = SEARCH_CHUNK
+        while head < tail:
+            chunk_left -= 1
+            if not chunk_left:
+                yield
+                self.check(generation)
+                chunk_left = SEARCH_CHUNK
+            current = queue[head]
+            head += 1
+            if flags[current] & block and not flags[current] & FLAG_TEAM and head > source_count:
+                continue
+            next_distance = distance[current] + 1
+            for neighbor in adjacency[current]:
+                if seen[neighbor] != generation and not flags[neighbor] & exclude:
+                    seen[neighbor] = generation
+                    parent[neighbor] = current
+                    distance[neighbor] = next_distance
+                    queue[tail] = neighbor
+                    tail += 1
+        return tail
+
+    # ======================== Tile Searches ======================== #
+
+    def strength_search(self, source, stop):
+        """
+        Search used by Tile.step_toward_me: track the opposing strength an army from my territory would face
+        on its way to source, until one of my tiles can overcome it.
+        :param stop: tile id that ends the search without a result (-1 for none)
+        :return: (tile id of my tile, tile id of its next step), or None
+        """
+        generation = self.begin()
+        seen, done, parent, value, queue = self.seen, self.done, self.parent, self.value, self.queue
+        adjacency, flags = self._map.adjacency, self._map.tile_flags
+        grid = self._map.flat_grid
+        team = self._map.my_team
+        player_index = self._map.player_index
+
+        seen[source] = generation
+        parent[source] = -1
+        value[source] = grid[source].army
+        queue[0] = source
+        head, tail = 0, 1
+
+        while head < tail:
+            current = queue[head]
+            head += 1
+            if current == stop:
+                return None
+
+            strength = value[current]
+            for neighbor in adjacency[current]:
+                if done[neighbor] == generation or flags[neighbor] & FLAG_MOUNTAIN:
+                    continue
+                tile = grid[neighbor]
+                if tile.tile in team:
+                    next_strength = strength - (tile.army + 1)
+                else:
+                    next_strength = strength + (tile.army + 1) * 1.1
+                if flags[neighbor] & FLAG_SWAMP:
+                    next_strength += 1
+                if seen[neighbor] != generation:
+                    seen[neighbor] = generation
+                    queue[tail] = neighbor
+                    tail += 1
+                    value[neighbor] = next_strength
+                    parent[neighbor] = current
+                elif next_strength < value[neighbor]:
+                    value[neighbor] = next_strength
+                    parent[neighbor] = current
+                if next_strength < 0 and tile.tile == player_index:
+                    return neighbor, current
+            done[current] = generation
+
+        return None
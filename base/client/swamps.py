@@ -0,0 +1,97 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Swamps: Swamp regions, their exits and the routes through them
+"""
+
+from array import array
+
+from .constants import *
+
+
+class SwampRegions(object):
+    """
+    Swamps never change during a game, so their connected components and the non-swamp tiles bordering each
+    component (exits) are found once at game start. The shortest in-swamp route from a swamp tile to each exit
+    is found the first time that tile is asked about and kept for the rest of the game; only the filtering on
+    ownership, armies and mountains discovered since then is done per query.
+    """
+    def __init__(self, game_map):
+        self._map = game_map
+        size = game_map.rows * game_map.cols
+        self.region = array('i', [-1]) * size  # Index into regions of each swamp tile (-1 if not a swamp)
+        self.regions = []  # Tuples of the tile ids in each swamp region
+        self.exits = []  # Tuples of the non-swamp tile ids bordering each swamp region
+        self._routes = {}  # Swamp tile id -> routes from it, see routes
+
+        adjacency = game_map.adjacency
+        swamp_mask = game_map.swamp_mask
+        for start in range(size):
+            if not swamp_mask[start] or self.region[start] != -1:
+                continue
+            index = len(self.regions)
+            self.region[start] = index
+            members = [start]
+            exits = []
+            for current in members:
+                for neighbor in adjacency[current]:
+                    if swamp_mask[neighbor]:
+                        if self.region[neighbor] == -1:
+                            self.region[neighbor] = index
+                            members.append(neighbor)
+                    elif neighbor not in exits:
+                        exits.append(neighbor)
+            self.regions.append(tuple(members))
+            self.exits.append(tuple(exits))
+
+    def routes(self, source):
+        """
+        :param source: tile id, usually a swamp
+        :return: List of (exit tile id, tuple of tile ids from source to that exit) for every tile bordering the
+            swamp containing source, in order of distance. Ownership and mountains are not checked here.
+        """
+        routes = self._routes.get(source)
+        if routes is None:
+            routes = self._search(source)
+            if self._map.swamp_mask[source]:
+                self._routes[source] = routes
+        return routes
+
+    def paths(self, source, armies=1e7):
+        """
+        Routes used by Tile.get_swamp_paths: exits not on my team (and not known to be mountains) that an army
+        of armies could reach.
+        :return: List of paths (Lists of Tiles) starting at source
+        """
+        grid, flags = self._map.flat_grid, self._map.tile_flags
+        return [[grid[i] for i in route] for exit_id, route in self.routes(source)
+                if not flags[exit_id] & (FLAG_MOUNTAIN | FLAG_TEAM) and 2 * (len(route) + 1) < armies]
+
+    # ======================== PRIVATE FUNCTIONS ======================== #
+
+    def _search(self, source):
+        # Flood the swamp containing source, recording the route to each bordering tile the first time it is seen
+        search = self._map.search
+        generation = search.begin()
+        seen, parent, queue = search.seen, search.parent, search.queue
+        adjacency, swamp_mask = self._map.adjacency, self._map.swamp_mask
+
+        seen[source] = generation
+        parent[source] = -1
+        queue[0] = source
+        head, tail = 0, 1
+
+        routes = []
+        while head < tail:
+            current = queue[head]
+            head += 1
+            for neighbor in adjacency[current]:
+                if seen[neighbor] == generation:
+                    continue
+                seen[neighbor] = generation
+                parent[neighbor] = current
+                if swamp_mask[neighbor]:
+                    queue[tail] = neighbor
+                    tail += 1
+                else:
+                    routes.append((neighbor, tuple(tile.tile_id for tile in search.path(neighbor))))
+        return routes
@@ -3,19 +3,25 @@
     Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
     Tile: Objects for representing Generals IO Tiles
 """
-from collections import deque
-from queue import Queue
-import time
 import logging
 
 from .constants import *
+from .distances import UNREACHABLE, walk_class
+from .search import exclude_flags
 
 
 class Tile(object):
+    __slots__ = (
+        'x', 'y', 'tile_id', 'tile', 'turn_captured', 'turn_held', 'turn_first_seen', 'army',
+        'is_city', 'is_mountain', 'is_swamp', 'is_general', 'is_basic',
+        '_map', '_general_index', '_is_main_force', '_neighbors',
+    )
+
     def __init__(self, game_map, x, y):
         # Public Properties
         self.x = x  # Integer X Coordinate
         self.y = y  # Integer Y Coordinate
+        self.tile_id = y * game_map.cols + x  # Integer index of this tile in the Map's flat arrays
         self.tile = TILE_FOG  # Integer Tile Type (TILE_OBSTACLE, TILE_FOG, TILE_MOUNTAIN, TILE_EMPTY, or player_ID)
         self.turn_captured = 0  # Integer Turn Tile Last Captured
         self.turn_held = 0  # Integer Last Turn Held
@@ -30,10 +36,8 @@ class Tile(object):
         # Private Properties
         self._map = game_map  # Pointer to Map Object
         self._general_index = -1  # Player Index if tile is a general
-        self._dirty_update_time = 0  # Last time Tile was updated by bot, not server
         self._is_main_force = False
-
-        self._distances = {}
+        self._neighbors = ()
 
     def __repr__(self):
         return "(%2d,%2d)[%2d,%3d]" % (self.x, self.y, self.tile, self.army)
@@ -44,18 +48,33 @@ class Tile(object):
     def __lt__(self, other):
         return self.army < other.army
 
+    def copy(self, game_map):
+        """
+        :return: a copy of this Tile on game_map, a clone of its map (see Map.clone). Its neighbors are still
+            this Tile's, Map.clone replaces them
+        """
+        tile = Tile.__new__(Tile)
+        tile.x, tile.y, tile.tile_id, tile.tile = self.x, self.y, self.tile_id, self.tile
+        tile.turn_captured, tile.turn_held, tile.turn_first_seen = self.turn_captured, self.turn_held, \
+            self.turn_first_seen
+        tile.army, tile.is_city, tile.is_mountain, tile.is_swamp = self.army, self.is_city, self.is_mountain, \
+            self.is_swamp
+        tile.is_general, tile.is_basic = self.is_general, self.is_basic
+        tile._map, tile._general_index, tile._is_main_force, tile._neighbors = game_map, self._general_index, \
+            self._is_main_force, self._neighbors
+        return tile
+
     def set_neighbors(self, game_map):
         self._map = game_map
         self._set_neighbors()
 
     def set_is_swamp(self, is_swamp):
         self.is_swamp = is_swamp
+        self._sync_map_arrays()
 
-    def update(self, game_map, tile, army, is_city=False, is_general=False, is_dirty=False):
+    def update(self, game_map, tile, army, is_city=False, is_general=False):
         self._map = game_map
-
-        if is_dirty:
-            self._dirty_update_time = time.time()
+        game_map._tile_updated(self)
 
         if self.tile < 0 or tile >= TILE_MOUNTAIN or (tile < TILE_MOUNTAIN and self.is_self()):
             # Tile should be updated
@@ -96,27 +115,22 @@ class Tile(object):
         if self.tile != self._map.player_index:
             self._is_main_force = False
 
+        self._sync_map_arrays()
+
     # ======================== Tile Properties ======================== #
 
-    def is_dirty(self):
-        return (time.time() - self._dirty_update_time) < 0.6
+    def is_dirty(self):  # A move I sent into this tile has not been executed yet
+        return self._map.pending_moves.mask[self.tile_id] != 0
 
-    def distance_to(self, dest):
+    def distance_to(self, dest):  # Manhattan distance. See Map.distances for walking distance
         if dest is not None:
-            if dest not in self._distances:
-                self._distances[dest] = abs(self.x - dest.x) + abs(self.y - dest.y)
-            return self._distances[dest]
+            return abs(self.x - dest.x) + abs(self.y - dest.y)
         return 0
 
     def neighbors(self, include_swamps=False, include_cities=True, include_obstacles=False):
-        neighbors = []
-        for tile in self._neighbors:
-            if not tile.is_mountain and \
-                    (include_swamps or not tile.is_swamp) and \
-                    (include_cities or not tile.is_city) and \
-                    (include_obstacles or tile.tile != TILE_OBSTACLE):
-                neighbors.append(tile)
-        return neighbors
+        exclude = exclude_flags(include_swamps, include_cities, include_obstacles)
+        flags = self._map.tile_flags
+        return [tile for tile in self._neighbors if not flags[tile.tile_id] & exclude]
 
     def is_valid_target(self):  # Check tile to verify reachability
         if self.tile in (TILE_MOUNTAIN, TILE_FOG, TILE_OBSTACLE):
@@ -200,15 +214,9 @@ class Tile(object):
     # ======================== Select Distant Tile ======================== #
 
     def nearest_tile_in_path(self, path):
-        dest = None
-        dest_distance = 9999
-        for tile in path:
-            distance = self.distance_to(tile)
-            if distance < tile_distance:
-                dest = tile
-                dest_distance = distance
-
-        return dest
+        if not path:
+            return None
+        return self._map.flow.field_from(path).nearest(self)
 
     def nearest_target_tile(self):
         if not self.is_self():
@@ -216,44 +224,49 @@ class Tile(object):
             return None
 
         max_target_army = self.army * 4 + 14
+        distances = self._map.flow.distances(self)
+
+        grid = self._map.flat_grid
+        pending = self._map.pending_moves.mask
 
         dest = None
         dest_distance = 9999
-        for x in range(self._map.cols):  # Check Each Square
-            for y in range(self._map.rows):
-                tile = self._map.grid[y][x]
-                # Non Target Tiles
-                if not tile.is_valid_target() or not tile.should_attack() or tile.army > max_target_army:
-                    continue
-
-                distance = self.distance_to(tile)
-                if tile.is_general:  # Generals appear closer
-                    distance = distance * 0.09
-                elif tile.is_city:  # Cities vary distance based on size, but appear closer
-                    # distance = distance * sorted((0.17, (tile.army / (3.2 * self.army)), 20))[1]
-                    distance *= 0.3
-
-                # if tile.tile == TILE_EMPTY:  # Empties appear further away
-                #     if tile.is_city:
-                #         distance = distance * 1.6
-                #     else:
-                #         distance = distance * 4.3
-
-                if tile.army > self.army:  # Larger targets appear further away
-                    distance = distance * (1.6 * tile.army / self.army)
-
-                if tile.is_swamp:  # Swamps appear further away
-                    distance = distance * 10 * 9999
-                    if tile.turn_held > 0:  # Swamps which have been held appear even further away
-                        distance = distance * 3
-
-                # Tiles with unknown neighbors appear closer
-                # distance *= 4 - tile.unknown_neighbor_count() * 1
-                # distance *= 4 - tile.unknown_neighbor_count() * 1
-
-                if distance < dest_distance:  # ----- Set nearest target -----
-                    dest = tile
-                    dest_distance = distance
+        for i in self._map.attack_candidates():  # Tiles passing should_attack (except is_dirty), in column order
+            tile = grid[i]
+            # Non Target Tiles
+            if tile.army > max_target_army or pending[i]:
+                continue
+
+            distance = distances[i]
+            if distance == UNREACHABLE:
+                continue
+            if tile.is_general:  # Generals appear closer
+                distance = distance * 0.09
+            elif tile.is_city:  # Cities vary distance based on size, but appear closer
+                # distance = distance * sorted((0.17, (tile.army / (3.2 * self.army)), 20))[1]
+                distance *= 0.3
+
+            # if tile.tile == TILE_EMPTY:  # Empties appear further away
+            #     if tile.is_city:
+            #         distance = distance * 1.6
+            #     else:
+            #         distance = distance * 4.3
+
+            if tile.army > self.army:  # Larger targets appear further away
+                distance = distance * (1.6 * tile.army / self.army)
+
+            if tile.is_swamp:  # Swamps appear further away
+                distance = distance * 10 * 9999
+                if tile.turn_held > 0:  # Swamps which have been held appear even further away
+                    distance = distance * 3
+
+            # Tiles with unknown neighbors appear closer
+            # distance *= 4 - tile.unknown_neighbor_count() * 1
+            # distance *= 4 - tile.unknown_neighbor_count() * 1
+
+            if distance < dest_distance:  # ----- Set nearest target -----
+                dest = tile
+                dest_distance = distance
         # if dest is None:
         #     print("Tile", self.x, self.y, ": No Targets")
         # else:
@@ -274,141 +287,60 @@ class Tile(object):
         if dest is None:
             return []
 
-        frontier: Queue[Tile] = Queue()
-        frontier.put(self)
-        came_from = {self: None}
-        army_count = {self: self.army}
-        processed = set()
+        return self._map.paths.army_path(self, dest, include_cities=include_cities,
+                                         include_obstacles=include_obstacles)
 
-        while not frontier.empty():
-            current = frontier.get()
-
-            if current == dest:  # Found Destination
-                break
+    def path_to_steps(self, dest, include_cities=False, include_obstacles=False):
+        """
+        path_to for anytime routines: yields None while searching, and returns the path.
+        Ex: path = yield from source.path_to_steps(dest)
+        """
+        if dest is None:
+            return []
 
-            for next in current.neighbors(
-                    include_swamps=True,
-                    include_cities=include_cities,
-                    include_obstacles=include_obstacles,
-            ):
-                if next not in processed and (next.is_on_team() or next == dest or next.army < army_count[current]):
-                    # priority = self.distance(next, dest)
-                    if next not in came_from:
-                        frontier.put(next)
-                    if next.is_on_team():
-                        next_army_count = army_count[current] + (next.army - 1)
-                    else:
-                        next_army_count = army_count[current] - (next.army + 1)
-                    if next not in army_count or next_army_count > army_count[next]:
-                        army_count[next] = next_army_count
-                        came_from[next] = current
-
-            processed.add(current)
-
-        if dest not in came_from:  # Did not find dest
-            if include_cities:
-                return []
-            else:
-                return self.path_to(dest, include_cities=True)
-
-        # Create Path List
-        path = _path_reconstruct(came_from, dest)
-
-        self._distances[dest] = len(path)
-        return path
+        return (yield from self._map.paths.army_path_steps(self, dest, include_cities=include_cities,
+                                                           include_obstacles=include_obstacles))
 
     def get_swamp_paths(self, armies=1e7):
         """
         :param armies: number of armies that an adjacent tile is considering sending here
         :return:
         """
-        swamp_paths = []
-        frontier: Queue[Tile] = Queue()
-        frontier.put(self)
-        came_from = {self: None}
-
-        while not frontier.empty():
-            current = frontier.get()
-
-            for neighbor in current.neighbors(include_swamps=True, include_cities=True, include_obstacles=True):
-                if neighbor in came_from:
-                    continue
-                came_from[neighbor] = current
-                if neighbor.is_swamp:
-                    frontier.put(neighbor)
-
-                elif not neighbor.is_mountain and not neighbor.is_on_team():
-                    path = []
-                    rev_path_current = neighbor
-                    while rev_path_current is not None:
-                        path.append(rev_path_current)
-                        rev_path_current = came_from[rev_path_current]
-                    if 2 * (len(path) + 1)< armies:
-                        path.reverse()
-                        swamp_paths.append(path)
-
-        return swamp_paths
+        return self._map.swamp_regions.paths(self.tile_id, armies)
 
     def get_best_swamp_path(self):
-        swamp_paths = self.get_swamp_paths()
-        if not swamp_paths:
+        grid, flags = self._map.flat_grid, self._map.tile_flags
+        # Routes out of this swamp to exits not on my team, shortest first
+        routes = [(grid[exit_id], route) for exit_id, route in self._map.swamp_regions.routes(self.tile_id)
+                  if not flags[exit_id] & (FLAG_MOUNTAIN | FLAG_TEAM)]
+        if not routes:
             # The swamp is a dead end or we've already explored the other sides
             return []
-        # there is a city at the end that I can capture
-        capture_paths = [
-            path for path in swamp_paths
-            if (path[-1].is_city or path[-1].tile == TILE_EMPTY) and
-               not path[-1].is_on_team() and
-               path[-1].army < self.army - len(path) - 1
-        ]
-        if capture_paths:
-            shortest_path = min(capture_paths, key=len)
-            return shortest_path
-        # there is something new to see at the end, go for that
-        explore_paths = [
-            path for path in swamp_paths
-            if path[-1].tile in [TILE_FOG, TILE_OBSTACLE] and not path[-1].is_mountain
-               and len(path) < self.army - 1
-        ]
-        if explore_paths:
-            shortest_path = min(explore_paths, key=len)
-            return shortest_path
-
-        # otherwise follow any of the other paths
-        shortest_path = min(swamp_paths, key=len)
-        return shortest_path
+
+        best = None
+        for exit_tile, route in routes:
+            # there is a city at the end that I can capture
+            if (exit_tile.is_city or exit_tile.tile == TILE_EMPTY) and exit_tile.army < self.army - len(route) - 1:
+                best = route
+                break
+        if best is None:
+            for exit_tile, route in routes:
+                # there is something new to see at the end, go for that
+                if exit_tile.tile in (TILE_FOG, TILE_OBSTACLE) and len(route) < self.army - 1:
+                    best = route
+                    break
+        if best is None:
+            # otherwise follow any of the other paths
+            best = routes[0][1]
+        return [grid[i] for i in best]
 
     def step_toward_me(self):
         largest_tile = self._map.find_largest_tile()
-        bfs_queue: deque[Tile] = deque([self])
-        processed = set()
-        go_next = {self:None}
-        opposing_strength = {self:self.army}
-
-        while bfs_queue:
-            current = bfs_queue.popleft()
-            if current == largest_tile:
-                return False, False
-            if current in processed:
-                continue
-            for neighbor in current.neighbors(True, True, True):
-                if neighbor not in processed:
-                    if neighbor not in go_next:
-                        bfs_queue.append(neighbor)
-                    if neighbor.is_on_team():
-                        next_opposing_strength = opposing_strength[current] - (neighbor.army + 1)
-                    else:
-                        next_opposing_strength = opposing_strength[current] + (neighbor.army + 1) * 1.1
-                    if neighbor.is_swamp:
-                        next_opposing_strength += 1
-                    if neighbor not in opposing_strength or next_opposing_strength < opposing_strength[neighbor]:
-                        opposing_strength[neighbor] = next_opposing_strength
-                        go_next[neighbor] = current
-                    if next_opposing_strength < 0 and neighbor.is_self():
-                        return neighbor, current
-            processed.add(current)
-
-        return False, False
+        step = self._map.search.strength_search(self.tile_id, -1 if largest_tile is None else largest_tile.tile_id)
+        if step is None:
+            return False, False
+        grid = self._map.flat_grid
+        return grid[step[0]], grid[step[1]]
 
     # ======================== PRIVATE FUNCTIONS ======================== #
 
@@ -422,20 +354,21 @@ class Tile(object):
                 tile = self._map.grid[y + dy][x + dx]
                 neighbors.append(tile)
 
-        self._neighbors = neighbors
-        return neighbors
+        self._neighbors = tuple(neighbors)
+        return self._neighbors
+
+    def _sync_map_arrays(self):
+        # Mirror this tile's state into the Map's flat tile_flags and tile_types arrays
+        flags = \
+            (FLAG_MOUNTAIN if self.is_mountain else 0) | \
+            (FLAG_SWAMP if self.is_swamp else 0) | \
+            (FLAG_CITY if self.is_city else 0) | \
+            (FLAG_OBSTACLE if self.tile == TILE_OBSTACLE else 0) | \
+            (FLAG_TEAM if self.tile in self._map.my_team else 0) | \
+            (FLAG_HELD if self.turn_held > 0 else 0)
+        if walk_class(flags) != walk_class(self._map.tile_flags[self.tile_id]):  # Terrain knowledge changed
+            self._map.terrain_version += 1
+        self._map.tile_flags[self.tile_id] = flags
+        self._map.tile_types[self.tile_id] = self.tile
 
     # ========================== PROPERTIES ============================ #
-
-def _path_reconstruct(came_from, dest):
-    current = dest
-    path = [current]
-    try:
-        while came_from[current] is not None:
-            current = came_from[current]
-            path.append(current)
-    except KeyError:
-        pass
-    path.reverse()
-
-    return path
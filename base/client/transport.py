@@ -0,0 +1,71 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Transport: Connections AsyncGenerals sends and receives frames over
+"""
+
+import asyncio
+
+
+class WebSocketTransport(object):
+    """
+    Connection to a generals.io server, using the websockets package
+    """
+    def __init__(self, url):
+        self.url = url
+        self._ws = None
+        self._closed_errors = ()
+
+    async def connect(self):
+        import websockets  # Only needed by the asyncio client
+        self._closed_errors = (websockets.ConnectionClosed,)
+        self._ws = await websockets.connect(self.url)
+
+    async def send(self, frame):
+        try:
+            await self._ws.send(frame)
+        except self._closed_errors:
+            pass
+
+    async def recv(self):
+        """
+        :return: the next frame, or None once the connection is closed
+        """
+        try:
+            return await self._ws.recv()
+        except self._closed_errors:
+            return None
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+
+
+class LocalTransport(object):
+    """
+    In-process connection, for running the client against a local server (ex: in tests). The server side reads
+    the frames the client sent from outbox, and puts the frames for the client on inbox (None closes the
+    connection).
+    """
+    def __init__(self):
+        self.inbox = asyncio.Queue()  # Frames to the client
+        self.outbox = asyncio.Queue()  # Frames from the client
+        self.closed = False
+
+    async def connect(self):
+        pass
+
+    async def send(self, frame):
+        if not self.closed:
+            await self.outbox.put(frame)
+
+    async def recv(self):
+        if self.closed:
+            return None
+        frame = await self.inbox.get()
+        if frame is None:
+            self.closed = True
+        return frame
+
+    async def close(self):
+        self.closed = True
+        self.inbox.put_nowait(None)
@@ -0,0 +1,186 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Replay: Steps a Map through a recorded game offline, optionally running a bot's move method each turn
+    Usage: python -m base.replay games/game_<replay>.rec [--bot bot_blob] [--profile] [--deadline [--speed N]]
+           [--turns N] [--seed N]
+"""
+
+import argparse
+import ast
+from collections import deque
+import cProfile
+import importlib
+import logging
+import pstats
+import random
+import time
+
+from .bot_scheduler import MoveScheduler
+from .client import frames
+from .client.constants import TURN_INTERVAL
+from .client.map import Map
+from .client.move_queue import QueuedMove
+from .client.recorder import RECORDING_EXTENSION, read_recording
+
+
+class ReplayBot(object):
+    """
+    Stands in for GeneralsBot during a replay: moves are recorded instead of sent. They are also kept in a queue
+    that, like the server's, gives up one move per turn, so queued_moves reads as it would in a live game.
+    """
+    def __init__(self, use_deadline=False):
+        self.moves = []  # (turn, source tile id, dest tile id, move_half)
+        self._queue = deque()  # QueuedMoves the server would still hold
+        self._turn = 0  # Turn of the last update
+        self._scheduler = MoveScheduler(use_deadline=use_deadline)
+        self._map = None
+
+    def turn_started(self, game_map):
+        # The server executes one queued move per turn elapsed
+        for _ in range(min(game_map.turn - self._turn, len(self._queue))):
+            self._queue.popleft()
+        self._turn = game_map.turn
+        self._map = game_map
+
+    def place_move(self, source, dest, move_half=False):
+        self.moves.append((self._map.turn, source.tile_id, dest.tile_id, move_half))
+        self._queue.append(QueuedMove(len(self.moves), source.tile_id, dest.tile_id, move_half))
+        return True
+
+    def place_moves(self, moves, move_half=False, replace=True):
+        if replace:
+            self._queue.clear()
+        for source, dest in moves:
+            self.place_move(source, dest, move_half)
+        return len(moves)
+
+    @property
+    def queued_moves(self):
+        return tuple(self._queue)
+
+    def run_routines(self, routines):
+        return self._scheduler.run(routines)
+
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+
+class Replay(object):
+    """
+    Feeds recorded game_start/game_update messages into a Map at full speed, the same way Generals does with
+    a live game. If a move method is given it is called after each update with a ReplayBot. Its routines run
+    without a deadline, so a replay makes the same moves every time; with use_deadline they run against the
+    deadline they would have had in a game at game_speed.
+    """
+    def __init__(self, messages, move_method=None, profiler=None, game_speed=1, use_deadline=False, seed=0):
+        self._messages = messages
+        self._seed = seed
+        self._turn_interval = TURN_INTERVAL / int(game_speed)
+        self._move_method = move_method
+        self._profiler = profiler
+        self.bot = ReplayBot(use_deadline)
+        self.game_map = None
+        self.turns = 0
+        self.update_time = 0  # Seconds spent in Map() and Map.update
+        self.move_times = []  # Seconds the move method took each turn
+        self.errors = 0  # Turns the move method raised on
+
+    def run(self, max_turns=None):
+        """
+        :return: the Map after the last update replayed
+        """
+        for game_map in self.maps():
+            if self._move_method is not None and not game_map.complete:
+                self._make_move(game_map)
+            if max_turns is not None and self.turns >= max_turns:
+                break
+        return self.game_map
+
+    def maps(self):
+        """
+        :return: Generator of the Map after each update
+        """
+        random.seed(self._seed)  # Bots break ties with random, so a replay makes the same moves every time
+        start_data = None
+        for msg in self._messages:
+            if msg[0] == "game_start":
+                start_data = msg[1]
+                self.game_map = None
+            elif msg[0] == "game_update":
+                start = time.perf_counter()
+                if self.game_map is None:
+                    self.game_map = Map(start_data, msg[1])
+                else:
+                    self.game_map.update(msg[1])
+                self.update_time += time.perf_counter() - start
+                self.turns += 1
+                yield self.game_map
+            elif msg[0] in ("game_won", "game_lost") and self.game_map is not None:
+                yield self.game_map.update_result(msg[0])
+
+    def _make_move(self, game_map):
+        self.bot.turn_started(game_map)
+        scheduler = self.bot.scheduler
+        scheduler.turn_started(game_map.turn)
+        scheduler.turn_interval = self._turn_interval  # Updates arrive back to back, not a turn apart
+        if self._profiler is not None:
+            self._profiler.enable()
+        start = time.perf_counter()
+        try:
+            scheduler.run_routine(self._move_method.__name__, lambda: self._move_method(self.bot, game_map))
+        except Exception:
+            logging.exception("Turn %d: move failed" % game_map.turn)
+            self.errors += 1
+        self.move_times.append(time.perf_counter() - start)
+        if self._profiler is not None:
+            self._profiler.disable()
+
+
+# ======================== Recorded Games ======================== #
+
+def read_messages(path):
+    """
+    :param path: a GameRecorder recording, or a file of the str(list) of messages games used to be saved as
+    :return: List of decoded messages ([event name, data, ...])
+    """
+    if path.endswith(RECORDING_EXTENSION):
+        return [frames.decode_frame(frame)[1] for frame in read_recording(path)]
+    with open(path) as file:
+        return ast.literal_eval(file.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded game offline")
+    parser.add_argument('path', help="Recorded game (games/game_*.rec, or an older games/game_*.txt)")
+    parser.add_argument('--bot', metavar='module', type=str, default=None,
+                        help="Bot module whose make_move is run each turn (ex: bot_blob)")
+    parser.add_argument('--profile', action='store_true', help="Profile the move method")
+    parser.add_argument('--deadline', action='store_true',
+                        help="Run the move method against the deadlines of a live game (off: no deadline)")
+    parser.add_argument('--speed', metavar='int', type=int, default=1,
+                        help="Game speed the move deadlines are set from, with --deadline (1, 2, 3 or 4)")
+    parser.add_argument('--turns', metavar='int', type=int, default=None, help="Stop after this many turns")
+    parser.add_argument('--seed', metavar='int', type=int, default=0,
+                        help="Seed of the random module bots break ties with (a seed always replays the same moves)")
+    args = parser.parse_args()
+
+    move_method = importlib.import_module(args.bot).make_move if args.bot else None
+    profiler = cProfile.Profile() if args.profile and move_method is not None else None
+    replay = Replay(read_messages(args.path), move_method, profiler, args.speed, args.deadline, args.seed)
+    game_map = replay.run(args.turns)
+
+    print("Replayed %d turns (last turn %s): %.1f ms updating the map" % (
+        replay.turns, game_map.turn if game_map is not None else "-", 1000 * replay.update_time))
+    if replay.move_times:
+        print("%s: %d moves, %d errors, %.2f ms mean, %.2f ms max per turn" % (
+            args.bot, len(replay.bot.moves), replay.errors, 1000 * sum(replay.move_times) / len(replay.move_times),
+            1000 * max(replay.move_times)))
+        if args.deadline:
+            print("Deadline misses: %s" % replay.bot.scheduler.report())
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+
+if __name__ == '__main__':
+    main()
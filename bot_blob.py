@@ -22,23 +22,23 @@ def make_move(current_bot, current_map):
     _bot = current_bot
     _map = current_map
 
-    if leave_swamp():
-        return
-
-    # move_explore()
-    # return
-
-    if move_priority():  # Capture a city or general if I have an adjacent larger force
+    if bot_moves.interrupt_queued_moves(_bot, _map):
         return
 
+    # Routines in priority order, run against this turn's deadline
+    routines = bot_moves.urgent_routines(_map)
     if _map.turn % 3 == 0:
-        if move_outward():  # Capture a regular tile if it's adjacent - preferably not a swamp
-            return
-    if _map.turn % 500 < 100 and move_explore():
-        return
-    if not move_toward():
-        move_outward()    # We get here on turn 1. not sure if it happens any other time.
-    return
+        # Capture a regular tile if it's adjacent - preferably not a swamp
+        routines.append(("move_outward", lambda: bot_moves.move_outward(_map)))
+    if _map.turn % 500 < 100:
+        routines.append(("move_explore", lambda: bot_moves.move_explore(_map)))
+    routines.append(("move_toward", move_toward))
+    # We get here on turn 1. not sure if it happens any other time.
+    routines.append(("move_outward", lambda: bot_moves.move_outward(_map)))
+
+    (source, dest) = _bot.run_routines(routines)
+    if source and dest:
+        place_move(source, dest)
 
 
 def place_move(source, dest):
@@ -47,57 +47,14 @@ def place_move(source, dest):
     _bot.place_move(source, dest, move_half=move_half)
 
 
-# ======================== Move Priority ======================== #
-
-def move_priority():
-    (source, dest) = bot_moves.move_priority(_map)
-    if source and dest:
-        place_move(source, dest)
-        return True
-    return False
-
-
-# ======================== Move Outward ======================== #
-
-def move_outward():
-    (source, dest) = bot_moves.move_outward(_map)
-    if source and dest:
-        place_move(source, dest)
-        return True
-    return False
-
-
 # ======================== Move Toward ======================== #
 
 def move_toward():
-    _map.path = bot_moves.path_proximity_target(_map)
-    (move_from, move_to) = bot_moves.move_path(_map.path)
-    if move_from and move_to:
-        # print("move_toward:", move_from, move_to)
-        place_move(move_from, move_to)
-        return True
-    return False
-
-
-# ======================== Leave Swamp ======================== #
-
-def leave_swamp():
-    (source, dest) = bot_moves.leave_swamp(_map)
-    if source and dest:
-        place_move(source, dest)
-        return True
-    return False
+    # Anytime routine: the path search yields while it runs, so it can be stopped at the deadline
+    _map.path = yield from bot_moves.path_proximity_target_steps(_map)
+    yield bot_moves.move_path(_map.path)
 
 
-# ======================== Explore ======================== #
-
-def move_explore():
-    (source, dest) = bot_moves.move_explore(_map)
-    if source and dest:
-        print("placing move %s %s" %(source, dest))
-        place_move(source, dest)
-        return True
-    return False
 # ======================== Main ======================== #
 
 # Start Game
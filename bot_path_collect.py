@@ -19,21 +19,29 @@ _map = None
 
 
 def make_move(current_bot, current_map):
-    global _bot, _map
+    global _bot, _map, _segment
     _bot = current_bot
     _map = current_map
+    _segment = []
+    if bot_moves.interrupt_queued_moves(_bot, _map):
+        return
 
-    # Make Move
+    # Routines in priority order, run against this turn's deadline
+    routines = []
     if _map.turn % 8 == 0:
-        if move_collect_to_path():
-            return
+        routines.append(("move_collect_to_path", move_collect_to_path))
     if _map.turn % 2 == 0:
-        if make_primary_move():
-            return
-    if not move_outward():
-        if not move_collect_to_path():
-            make_primary_move()
-    return
+        routines.append(("make_primary_move", make_primary_move))
+    routines.append(("move_outward", move_outward))
+    routines.append(("move_collect_to_path", move_collect_to_path))
+    routines.append(("make_primary_move", make_primary_move))
+    routines.append(("move_outward", move_outward))  # Cheap fallback, the only routine still run past the deadline
+
+    (source, dest) = _bot.run_routines(routines)
+    if _segment and _segment[0] == (source, dest):  # Queue the whole primary path segment
+        _bot.place_moves(_segment)
+    elif source and dest:
+        place_move(source, dest)
 
 
 def place_move(source, dest):
@@ -43,21 +51,25 @@ def place_move(source, dest):
 # ======================== Primary Move Making ======================== #
 
 def make_primary_move():
-    update_primary_target()
+    # Anytime routine: the path searches yield while they run, so they can be stopped at the deadline
+    yield from update_primary_target()
     if len(_map.path) > 1:
-        return move_primary_path_forward()
+        yield (yield from move_primary_path_forward())
     elif _target is not None:
-        new_primary_path()
-    return False
+        yield from new_primary_path(_target)
 
 
 # ======================== Primary Targeting ======================== #
 
 _target = None
 _path_position = 0
+_segment = []  # Moves of the primary path segment found this turn, see move_primary_path_forward
 
 
 def update_primary_target():
+    """
+    Generator yielding None while a new primary path is searched for
+    """
     global _target
     moves_left = 100
     path_length = len(_map.path)
@@ -71,53 +83,71 @@ def update_primary_target():
     new_target = _map.find_primary_target(_target)
 
     if _target != new_target:
-        _target = new_target
-        new_primary_path(restore_old_position=True)
+        yield from new_primary_path(new_target, restore_old_position=True)
 
 
 # ======================== Primary Path ======================== #
 
 def move_primary_path_forward():
-    global _path_position
+    """
+    Generator yielding None while a new primary path is searched for
+    :return: first move of the path segment the army on the path can carry (kept in _segment), or (False, False)
+    """
+    global _path_position, _segment
     try:
         source = _map.path[_path_position]
     except IndexError:
         # logging.debug("Invalid Current Path Position")
-        return new_primary_path()
+        yield from new_primary_path(_target)
+        return False, False
 
     if source.tile != _map.player_index or source.army < 2:  # Out of Army, Restart Path
         # logging.debug("Path Error: Out of Army (%d,%d)" % (source.tile, source.army))
-        return new_primary_path()
+        yield from new_primary_path(_target)
+        return False, False
 
     try:
         dest = _map.path[_path_position + 1]  # Determine Destination
         if dest.tile == _map.player_index or source.army > (dest.army + 1):
-            place_move(source, dest)
+            # Queue the whole segment the army can carry, so following it takes no further moves from me
+            moves = bot_moves.path_moves(_map.path, _path_position)
         else:
             # logging.debug("Path Error: Out of Army To Attack (%d,%d,%d,%d)" % (dest.x,dest.y,source.army,dest.army))
-            return new_primary_path()
+            yield from new_primary_path(_target)
+            return False, False
     except IndexError:
         # logging.debug("Path Error: Target Destination Out Of List Bounds")
-        return new_primary_path(restore_old_position=True)
+        yield from new_primary_path(_target, restore_old_position=True)
+        return False, False
 
-    _path_position += 1
-    return True
+    if not moves:
+        return False, False
+    _segment = moves
+    _path_position += len(moves)
+    return moves[0]
 
 
-def new_primary_path(restore_old_position=False):
-    global _bot, _path_position, _target
+def new_primary_path(target, restore_old_position=False):
+    """
+    Generator yielding None while the path to target is searched for. The primary target and path are only
+    updated once the search has finished, so a search stopped at the deadline leaves them as they were.
+    :return: whether the position on the old path was restored
+    """
+    global _path_position, _target
+
+    # Determine Source and Path
+    source = _map.find_city()
+    if source is None:
+        source = _map.find_largest_tile(include_general=True)
+    path = yield from source.path_to_steps(target)  # Find new path to target
 
     # Store Old Tile
     old_tile = None
     if _path_position > 0 and len(_map.path) > 0:  # Store old path position
         old_tile = _map.path[_path_position]
     _path_position = 0
-
-    # Determine Source and Path
-    source = _map.find_city()
-    if source is None:
-        source = _map.find_largest_tile(include_general=True)
-    _map.path = source.path_to(_target)  # Find new path to target
+    _target = target
+    _map.path = path
 
     # Restore Old Tile
     if restore_old_position and old_tile is not None:
@@ -132,18 +162,18 @@ def new_primary_path(restore_old_position=False):
 # ======================== Move Outward ======================== #
 
 def move_outward():
-    (source, dest) = bot_moves.move_outward(_map, _map.path)
-    if source:
-        place_move(source, dest)
-        return True
-    return False
+    return bot_moves.move_outward(_map, _map.path)
 
 
 # ======================== Collect To Path ======================== #
 
 def find_collect_path():
+    """
+    Generator yielding None while searching
+    :return: path from my largest tile off the primary path to a target, or to the primary path
+    """
     # Find Largest Tile
-    source = _map.find_largest_tile(not_in_path=_map.path, include_general=0.33)
+    source = _map.find_largest_tile(tiles_to_exclude=_map.path, include_general=0.33)
     if source is None or source.army < 4:
         _map.collect_path = []
         return _map.collect_path
@@ -156,20 +186,13 @@ def find_collect_path():
         dest = source.nearest_tile_in_path(_map.path)
 
     # Return Path
-    return source.path_to(dest)
+    return (yield from source.path_to_steps(dest))
 
 
 def move_collect_to_path():
-    # Update Path
-    _map.collect_path = find_collect_path()
-
-    # Perform Move
-    (move_from, move_to) = bot_moves.move_path(_map.collect_path)
-    if move_from is not None:
-        place_move(move_from, move_to)
-        return True
-
-    return False
+    # Anytime routine, see make_primary_move
+    _map.collect_path = yield from find_collect_path()
+    yield bot_moves.move_path(_map.collect_path)
 
 
 # ======================== Main ======================== #
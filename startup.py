@@ -8,7 +8,7 @@ import argparse
 from base import bot_base
 
 
-def startup(move_method, move_event=None, bot_name="Brobot"):
+def startup(move_method, move_event=None, bot_name="Brobot", speculate=False):
     parser = argparse.ArgumentParser()
     parser.add_argument('-name', metavar='str', type=str, default=os.environ.get('GENERALS_BOT_NAME', bot_name),
                         help='Name of Bot')
@@ -19,6 +19,8 @@ def startup(move_method, move_event=None, bot_name="Brobot"):
     parser.add_argument('-c', '--command', metavar='str', type=str, default="", help='Initial Setup Command (optional)')
     parser.add_argument('--no-ui', action='store_false', help="Hide UI (no game viewer)")
     parser.add_argument('--public', action='store_true', help="Run on public (not bot) server")
+    parser.add_argument('--speculate', action='store_true',
+                        help="Compute each next move ahead of its update (costs a second map, see Speculator)")
     args = vars(parser.parse_args())
 
     if move_method is None:
@@ -26,4 +28,4 @@ def startup(move_method, move_event=None, bot_name="Brobot"):
 
     bot_base.GeneralsBot(move_method, move_event=move_event, name=args['name'], game_type=args['gameType'],
                          private_room_id=args['roomID'], show_game_viewer=args['no_ui'], public_server=args['public'],
-                         start_msg_cmd=args['command'])
+                         start_msg_cmd=args['command'], speculate=speculate or args['speculate'])
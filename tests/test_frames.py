@@ -0,0 +1,44 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Frame Tests: decode_frame with orjson and with the json fallback
+"""
+
+import importlib
+import sys
+
+import pytest
+
+from base.client import frames
+
+FRAMES = [
+    ("3", "3", None),
+    ("40", "40", None),
+    ('0{"sid":"abc","pingInterval":25000}', "0", {"sid": "abc", "pingInterval": 25000}),
+    ('42["game_update",{"turn":3,"map_diff":[0,2,5,-1,9],"cities_diff":[0]}]', "42",
+     ["game_update", {"turn": 3, "map_diff": [0, 2, 5, -1, 9], "cities_diff": [0]}]),
+    ('42["chat_message","game_1",{"text":"gl hf \\u00e9"}]', "42", ["chat_message", "game_1", {"text": "gl hf é"}]),
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setitem(sys.modules, "orjson", None)  # import orjson raises ImportError
+    module = importlib.reload(frames)
+    assert module.JSON_BACKEND == request.param
+    yield module
+    monkeypatch.undo()
+    importlib.reload(frames)
+
+
+def test_decode_frame(backend):
+    for frame, prefix, msg in FRAMES:
+        assert backend.decode_frame(frame) == (prefix, msg)
+
+
+def test_split_frame():
+    assert frames.split_frame('42["a"]') == ("42", '["a"]')
+    assert frames.split_frame("3") == ("3", "")
+    assert frames.split_frame('["a"]') == ("", '["a"]')
@@ -0,0 +1,167 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Asyncio Client Tests: AsyncGenerals driven over a LocalTransport
+"""
+
+import asyncio
+import json
+
+from base import bot_moves
+from base.client.constants import PING_MAX_WAIT, SEND_PRIORITY_MOVE
+from base.client.generals_async import AsyncGenerals
+from base.client.transport import LocalTransport
+from tools.synthetic_game import SyntheticGame
+
+
+async def _serve(transport, game, turns):
+    transport.inbox.put_nowait('0{"sid":"local","pingInterval":25000}')
+    transport.inbox.put_nowait("40")
+    transport.inbox.put_nowait("42" + json.dumps(["game_start", game.start_data()]))
+    for data in game.frames(turns):
+        transport.inbox.put_nowait("42" + json.dumps(["game_update", data]))
+        await asyncio.sleep(0.001)
+    transport.inbox.put_nowait(None)
+
+
+async def _play(turns):
+    transport = LocalTransport()
+    client = AsyncGenerals("user", "user", "private", "room", force_start=False, transport=transport)
+    await client.connect()
+    server = asyncio.get_running_loop().create_task(_serve(transport, SyntheticGame(20, 20, seed=1), turns))
+
+    maps, move_ids = [], []
+    async for game_map in client.get_updates():
+        maps.append(game_map.turn)
+        source, dest = bot_moves.move_outward(game_map)
+        if source:
+            move_ids.append(client.move(source.y, source.x, dest.y, dest.x))
+    await server
+    await asyncio.sleep(0.01)  # Let the sender drain
+
+    sent = []
+    while not transport.outbox.empty():
+        sent.append(transport.outbox.get_nowait())
+    return client, maps, [move_id for move_id in move_ids if move_id], sent
+
+
+def test_async_client_over_local_transport(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The client records the game under games/
+    client, maps, move_ids, sent = asyncio.run(_play(30))
+    assert maps == list(range(1, 32))
+    assert client.ping_interval == 25
+
+    events = [json.loads(frame[2:]) for frame in sent if frame.startswith("42")]
+    assert events[0][0] == "set_username"
+    assert events[1][:2] == ["join_private", "room"]
+    attacks = [event for event in events if event[0] == "attack"]
+    assert move_ids
+    assert [attack[4] for attack in attacks] == move_ids
+    assert all(frame == "2" for frame in sent if not frame.startswith("42"))
+
+
+async def _send_backlog(ping_age):
+    transport = LocalTransport()
+    client = AsyncGenerals("user", "user", "private", "room", force_start=False, transport=transport)
+    await client.connect()
+    client._queue_ping()
+    client._ping_queued_at -= ping_age
+    for move_id in range(20):  # Moves and lobby frames queued behind the ping
+        client._send(["attack", 0, 1, False, move_id], SEND_PRIORITY_MOVE)
+    client._send(["set_custom_options", "room", {}])
+    await asyncio.sleep(0.01)
+    client.close()
+    await asyncio.sleep(0.01)
+
+    sent = []
+    while not transport.outbox.empty():
+        sent.append(transport.outbox.get_nowait())
+    return sent
+
+
+def test_moves_sent_ahead_of_heartbeat():
+    sent = asyncio.run(_send_backlog(0))
+    assert sent.count("2") == 1 and sent[-1] == "2"
+    assert [json.loads(frame[2:])[0] for frame in sent[:20]] == ["attack"] * 20
+    assert json.loads(sent[-2][2:])[0] == "set_custom_options"
+
+
+def test_overdue_heartbeat_sent_ahead_of_queued_frames():
+    sent = asyncio.run(_send_backlog(PING_MAX_WAIT))
+    assert sent.count("2") == 1 and sent[0] == "2"
+    assert [json.loads(frame[2:])[0] for frame in sent[1:21]] == ["attack"] * 20
+
+
+async def _move_then_invalid_move():
+    transport = LocalTransport()
+    client = AsyncGenerals("user", "user", "private", "room", force_start=False, transport=transport)
+    await client.connect()
+    game = SyntheticGame(20, 20, seed=1)
+    transport.inbox.put_nowait("42" + json.dumps(["game_start", game.start_data()]))
+    for data in game.frames(10):  # Time for the general to gather armies
+        transport.inbox.put_nowait("42" + json.dumps(["game_update", data]))
+
+    results = []
+    async for game_map in client.get_updates():
+        if game_map.turn < 11:
+            continue
+        general = game_map.generals[game_map.player_index]
+        dest = next(tile for tile in general.neighbors() if not tile.is_mountain)
+        enemy = next(tile for tile in game_map.grid[0] if tile.tile != game_map.player_index)
+        results.append(client.move(general.y, general.x, dest.y, dest.x))
+        results.append(client.move(enemy.y, enemy.x, general.y, general.x))  # Invalid: not my tile
+        break
+    await asyncio.sleep(0.01)
+    transport.inbox.put_nowait(None)
+    await asyncio.sleep(0.01)
+
+    sent = []
+    while not transport.outbox.empty():
+        sent.append(transport.outbox.get_nowait())
+    return client, results, [json.loads(frame[2:]) for frame in sent if frame.startswith('42["attack"')]
+
+
+def test_dropped_move_does_not_supersede(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client, results, attacks = asyncio.run(_move_then_invalid_move())
+    assert results[0] and results[1] is False
+    assert [attack[4] for attack in attacks] == [results[0]]
+    assert client._coalescer.avoided["superseded"] == 0
+
+
+async def _move_twice_with_immediate_writer():
+    transport = LocalTransport()
+    client = AsyncGenerals("user", "user", "private", "room", force_start=False, transport=transport)
+    await client.connect()
+    send_frame = client._send_frame
+
+    def send_frame_and_take(frame, priority, order=None):  # As if the writer took each move as soon as queued
+        order = send_frame(frame, priority, order)
+        if priority == SEND_PRIORITY_MOVE:
+            client._coalescer.should_send(order)
+        return order
+    client._send_frame = send_frame_and_take
+
+    game = SyntheticGame(20, 20, seed=1)
+    transport.inbox.put_nowait("42" + json.dumps(["game_start", game.start_data()]))
+    for data in game.frames(10):
+        transport.inbox.put_nowait("42" + json.dumps(["game_update", data]))
+
+    results = []
+    async for game_map in client.get_updates():
+        if game_map.turn < 11:
+            continue
+        general = game_map.generals[game_map.player_index]
+        for dest in [tile for tile in general.neighbors() if not tile.is_mountain][:2]:
+            results.append(client.move(general.y, general.x, dest.y, dest.x, move_half=True))
+        break
+    transport.inbox.put_nowait(None)
+    await asyncio.sleep(0.01)
+    return client, results
+
+
+def test_sent_move_is_not_superseded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client, results = asyncio.run(_move_twice_with_immediate_writer())
+    assert len(results) == 2 and all(results)
+    assert client._coalescer.avoided["superseded"] == 0
+    assert [move.move_id for move in client.queued_moves] == results
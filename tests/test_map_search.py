@@ -0,0 +1,33 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Map Search Tests: find_largest_tile and find_city
+"""
+
+from base.client.map import Map
+from tools.synthetic_game import SyntheticGame
+
+
+def _game_map(turns):
+    game = SyntheticGame(20, 20, players=2, seed=4)
+    frames = list(game.frames(turns))
+    game_map = Map(game.start_data(), frames[0])
+    for data in frames:
+        game_map.update(data)
+    return game_map
+
+
+def test_exclusion_lists_may_hold_none():
+    # Ex: path_gather excludes find_largest_tile(), which is None while I only own my general
+    game_map = _game_map(0)
+    assert game_map.find_largest_tile() is None
+    assert game_map.find_largest_tile(tiles_to_exclude=[None], include_general=0.5) == \
+           game_map.generals[game_map.player_index]
+    assert game_map.find_city(not_in_path=[None], include_general=True) == game_map.generals[game_map.player_index]
+
+
+def test_exclusion_lists():
+    game_map = _game_map(100)
+    largest = game_map.find_largest_tile()
+    assert largest is not None
+    second = game_map.find_largest_tile(tiles_to_exclude=[largest, None])
+    assert second is not None and second != largest and second.army <= largest.army
@@ -0,0 +1,96 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Map Update Tests: diff application and the change-driven Map.update
+"""
+
+import random
+
+from base.client.map import Map, _apply_diff, _apply_map_diff
+from tools.synthetic_game import SyntheticGame, encode_diff
+
+TILE_STATE = ('tile', 'army', 'is_city', 'is_general', 'is_mountain', 'is_basic',
+              'turn_captured', 'turn_held', 'turn_first_seen')
+
+
+def test_apply_diff():
+    cache = [1, 2, 3, 4, 5]
+    _apply_diff(cache, [1, 2, 7, 8, 2])
+    assert cache == [1, 7, 8, 4, 5]
+
+    _apply_diff(cache, [0, 1, 9, 2, 1, 6])  # No trailing unchanged count: the tail is kept
+    assert cache == [9, 7, 8, 6, 5]
+
+    cache = []
+    _apply_diff(cache, [0, 3, 1, 2, 3])
+    assert cache == [1, 2, 3]
+
+
+def test_apply_map_diff_matches_apply_diff():
+    rng = random.Random(1)
+    rows, cols = 7, 9
+    size = rows * cols
+    board = [cols, rows] + [rng.randint(0, 50) for _ in range(size)] + [rng.randint(-4, 3) for _ in range(size)]
+    armies, terrain = board[2:2 + size], board[2 + size:]
+    for _ in range(50):
+        new_board = list(board)
+        for i in rng.sample(range(2, len(board)), rng.randint(0, 20)):
+            new_board[i] = rng.randint(-4, 50)
+        expected_changed = {(i - 2) % size for i in range(2, len(board)) if new_board[i] != board[i]}
+
+        changed = set()
+        _apply_map_diff(armies, terrain, encode_diff(board, new_board), changed)
+        _apply_diff(board, encode_diff(board, new_board))
+        assert board == new_board
+        assert armies == board[2:2 + size]
+        assert terrain == board[2 + size:]
+        assert changed == expected_changed
+
+
+def _tile_states(game_map):
+    return [tuple(getattr(tile, name) for name in TILE_STATE) for tile in game_map.flat_grid]
+
+
+def test_update_matches_full_scan():
+    game = SyntheticGame(24, 24, players=4, seed=7)
+    frames = list(game.frames(300))
+    changed_only = Map(game.start_data(), frames[0])
+    full_scan = Map(game.start_data(), frames[0])
+    for data in frames[1:]:
+        full_scan._pending_updates.update(range(full_scan.rows * full_scan.cols))  # Every tile, as before
+        changed_only.update(data)
+        full_scan.update(data)
+
+        assert _tile_states(changed_only) == _tile_states(full_scan), "turn %d" % data['turn']
+        assert [tile.tile_id for tile in changed_only.cities] == [tile.tile_id for tile in full_scan.cities]
+        assert [tile and tile.tile_id for tile in changed_only.generals] == \
+               [tile and tile.tile_id for tile in full_scan.generals]
+        for player in range(game.players):
+            assert sorted(tile.tile_id for tile in changed_only.tiles[player]) == \
+                   sorted(tile.tile_id for tile in full_scan.tiles[player])
+
+
+def test_clone_follows_updates_like_the_map():
+    game = SyntheticGame(24, 24, players=4, seed=7)
+    frames = list(game.frames(200))
+    game_map = Map(game.start_data(), frames[0])
+    for data in frames[:100]:
+        game_map.update(data)
+    game_map.find_largest_tile()  # Indexes already built on the map start out empty on the clone
+    clone = game_map.clone()
+    assert all(a is not b and b._map is clone for a, b in zip(game_map.flat_grid, clone.flat_grid))
+    assert all(n._map is clone for tile in clone.flat_grid for n in tile._neighbors)
+
+    for data in frames[100:]:
+        game_map.update(data)
+        clone.update(data)
+        assert _tile_states(clone) == _tile_states(game_map), "turn %d" % data['turn']
+        assert clone.tile_flags == game_map.tile_flags and clone.tile_types == game_map.tile_types
+        assert [tile.tile_id for tile in clone.cities] == [tile.tile_id for tile in game_map.cities]
+        for player in range(game.players):
+            assert [tile.tile_id for tile in clone.tiles[player]] == [tile.tile_id for tile in game_map.tiles[player]]
+        assert clone.attack_candidates() == game_map.attack_candidates()
+        assert clone.find_largest_tile().tile_id == game_map.find_largest_tile().tile_id
+        assert [tile.tile_id for tile in clone.border.tiles()] == [tile.tile_id for tile in game_map.border.tiles()]
+        assert clone.exploration.distance == game_map.exploration.distance
+        target, clone_target = game_map.get_exploration_target(), clone.get_exploration_target()
+        assert (clone_target and clone_target.tile_id) == (target and target.tile_id)
@@ -0,0 +1,113 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Pathfinding Tests: Tile.path_to against the Queue based search it replaced, and anytime (chunked) searches
+"""
+
+import random
+import time
+
+import pytest
+
+from base.bot_scheduler import MoveScheduler, NO_MOVE
+from base.client.constants import FLAG_MOUNTAIN, SEARCH_CHUNK
+from base.client.map import Map
+from tools.bench_pathfinding import queue_path_to
+from tools.synthetic_game import SyntheticGame
+
+
+def _maps(rows, cols, turns=200, seed=11):
+    game = SyntheticGame(rows, cols, players=4, seed=seed)
+    frames = game.frames(turns)
+    game_map = Map(game.start_data(), next(frames))
+    for data in frames:
+        yield game_map.update(data)
+
+
+def test_path_to_matches_queue_search():
+    rng = random.Random(5)
+    for rows, cols in [(15, 15), (30, 20)]:
+        for game_map in _maps(rows, cols):
+            if game_map.turn % 10:
+                continue
+            mine = game_map.tiles[game_map.player_index]
+            for _ in range(20):
+                source, dest = rng.choice(mine), rng.choice(game_map.flat_grid)
+                include_cities, include_obstacles = rng.random() < 0.5, rng.random() < 0.5
+                assert source.path_to(dest, include_cities, include_obstacles) == \
+                       queue_path_to(source, dest, include_cities, include_obstacles), "turn %d" % game_map.turn
+
+
+def test_expansion_budget_bounds_the_whole_call():
+    rng = random.Random(6)
+    for game_map in _maps(30, 30, turns=100):
+        pass
+    paths = game_map.paths
+    mine = game_map.tiles[game_map.player_index]
+    for _ in range(100):
+        source, dest = rng.choice(mine), rng.choice(game_map.flat_grid)
+        paths.max_expansions = None
+        full = source.path_to(dest)
+        unlimited = paths.expansions
+
+        paths.max_expansions = budget = rng.randint(1, 40)
+        path = source.path_to(dest)
+        assert paths.expansions <= budget
+        assert paths.budget_exhausted == (unlimited > budget)
+        if not paths.budget_exhausted:
+            assert path == full
+        elif path:  # Cut short: any route found still leads from source to dest
+            assert path[0] == source and path[-1] == dest
+    paths.max_expansions = None
+
+
+def test_path_steps_match_path_to():
+    rng = random.Random(7)
+    for game_map in _maps(40, 40, turns=150):
+        pass
+    mine = game_map.tiles[game_map.player_index]
+    chunks = 0
+    for _ in range(40):
+        source, dest = rng.choice(mine), rng.choice(game_map.flat_grid)
+        steps = source.path_to_steps(dest, include_cities=True)
+        try:
+            while True:
+                assert next(steps) is None
+                chunks += 1
+        except StopIteration as stop:
+            assert stop.value == source.path_to(dest, include_cities=True)
+    assert chunks > 0
+
+
+def test_path_search_stops_at_deadline():
+    for game_map in _maps(40, 40, turns=150):
+        pass
+    rng = random.Random(8)
+    mine = game_map.tiles[game_map.player_index]
+    while True:  # A path that takes more than one chunk to find
+        source, dest = rng.choice(mine), rng.choice(game_map.flat_grid)
+        path = source.path_to(dest)
+        if len(path) > 1 and game_map.paths.expansions > SEARCH_CHUNK:
+            break
+
+    def routine():
+        found = yield from source.path_to_steps(dest)
+        yield found[0], found[1]
+
+    scheduler = MoveScheduler()
+    scheduler.turn_started(1)
+    assert scheduler.run_routine("path", routine) == (path[0], path[1])
+
+    scheduler.turn_started(2, now=time.perf_counter() - 10)  # Deadline long gone: stopped at the first chunk
+    assert scheduler.run_routine("path", routine) == NO_MOVE
+    assert scheduler.misses == {"path": 1}
+    assert game_map.paths.expansions == SEARCH_CHUNK - 1
+
+
+def test_suspended_search_detects_reused_buffers():
+    for game_map in _maps(30, 30, turns=100):
+        pass
+    steps = game_map.search.bfs_steps([game_map.generals[game_map.player_index].tile_id], FLAG_MOUNTAIN)
+    next(steps)
+    game_map.search.bfs([0], FLAG_MOUNTAIN)
+    with pytest.raises(RuntimeError):
+        next(steps)
@@ -0,0 +1,33 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Replay Tests: replaying a recorded game offline
+"""
+
+import json
+import random
+
+import bot_path_collect
+from base.client.recorder import GameRecorder
+from base.replay import Replay, read_messages
+from tools.synthetic_game import SyntheticGame
+
+
+def _record(path, turns):
+    game = SyntheticGame(20, 20, players=2, seed=2)
+    recorder = GameRecorder(str(path))
+    recorder.record("42" + json.dumps(["game_start", game.start_data()]))
+    for data in game.frames(turns):
+        recorder.record("42" + json.dumps(["game_update", data]))
+    recorder.close()
+
+
+def test_replay_is_reproducible(tmp_path):
+    path = tmp_path / "game_synthetic.rec"
+    _record(path, 200)
+    moves = []
+    for state in range(2):
+        random.seed(state)  # Whatever the random state before, the replay seeds it
+        replay = Replay(read_messages(str(path)), bot_path_collect.make_move)
+        replay.run()
+        moves.append(replay.bot.moves)
+    assert moves[0] and moves[0] == moves[1]
@@ -0,0 +1,65 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Scheduler Tests: MoveScheduler deadlines and fallbacks
+"""
+
+import time
+
+from base.bot_scheduler import MoveScheduler, NO_MOVE
+
+
+def _routine(calls, name, move):
+    def routine():
+        calls.append(name)
+        return move
+    return name, routine
+
+
+def test_first_move_found_wins():
+    scheduler = MoveScheduler()
+    scheduler.turn_started(1)
+    calls = []
+    routines = [_routine(calls, "none", NO_MOVE), _routine(calls, "found", (1, 2)), _routine(calls, "last", (3, 4))]
+    assert scheduler.run(routines) == (1, 2)
+    assert calls == ["none", "found"]
+    assert scheduler.misses == {}
+
+
+def test_fallback_runs_after_deadline():
+    scheduler = MoveScheduler()
+    scheduler.turn_started(1, now=time.perf_counter() - 10)  # Deadline long gone
+    calls = []
+    routines = [_routine(calls, "first", (1, 2)), _routine(calls, "fallback", (3, 4))]
+    assert scheduler.run(routines) == (3, 4)
+    assert calls == ["fallback"]
+    assert scheduler.misses == {"fallback": 1}
+
+
+def test_anytime_routine_keeps_best_move():
+    scheduler = MoveScheduler()
+    scheduler.turn_started(1)
+
+    def anytime():
+        yield 1, 2
+        scheduler.turn_start -= 10  # The deadline passes while the routine is still improving its move
+        yield 3, 4
+        yield 5, 6
+
+    assert scheduler.run([("anytime", anytime)]) == (3, 4)
+    assert scheduler.misses == {"anytime": 1}
+
+
+def test_without_deadline_every_routine_runs():
+    scheduler = MoveScheduler(use_deadline=False)
+    scheduler.turn_started(1, now=time.perf_counter() - 10)
+    calls = []
+    routines = [_routine(calls, "none", NO_MOVE), _routine(calls, "found", (1, 2)), _routine(calls, "last", (3, 4))]
+    assert scheduler.run(routines) == (1, 2)
+    assert calls == ["none", "found"]
+
+    def anytime():
+        yield 1, 2
+        yield 3, 4
+
+    assert scheduler.run([("anytime", anytime)]) == (3, 4)
+    assert scheduler.misses == {}
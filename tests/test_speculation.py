@@ -0,0 +1,103 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Speculation Tests: the move method's module state around speculative runs, and predictions in a played game
+"""
+
+import random
+import threading
+
+import bot_blob
+from base.bot_speculation import Speculator, _board, _make_update_data
+from base.client.map import Map
+from base.replay import ReplayBot
+from tools.synthetic_game import SyntheticGame
+
+_bot = None
+_map = None
+_general = None
+_runs = 0
+
+
+def _make_move(current_bot, current_map):
+    global _bot, _map, _general, _runs
+    _bot = current_bot
+    _map = current_map
+    _general = current_map.generals[current_map.player_index]
+    _runs += 1
+
+
+def _game_map(turns):
+    game = SyntheticGame(20, 20, players=2, seed=4)
+    frames = list(game.frames(turns))
+    game_map = Map(game.start_data(), frames[0])
+    for data in frames:
+        game_map.update(data)
+    return game_map
+
+
+def test_speculation_restores_module_state():
+    speculator = Speculator(_make_move)
+    speculator.speculate(_game_map(10), [], 0.5)
+    assert (_bot, _map, _general, _runs) == (None, None, None, 0)
+
+
+def test_commit_applies_module_state_to_live_map():
+    global _bot, _map, _general, _runs
+    game_map = _game_map(10)
+    speculator = Speculator(_make_move)
+    speculator.speculate(game_map, [], 0.5)
+
+    shadow = speculator._shadow  # A live map that reached exactly the predicted board
+    data = _make_update_data([], _board(shadow), [], shadow._cities_private, shadow._generals_private,
+                             shadow.scores, shadow.turn)
+    live = Map(game_map._start_data, data)
+    live.update(data)
+    bot = object()
+    try:
+        assert speculator.commit(bot, live)
+        assert _bot is bot and _map is live and _runs == 1
+        assert _general is live.flat_grid[game_map.generals[game_map.player_index].tile_id]
+    finally:
+        _bot, _map, _general, _runs = None, None, None, 0
+
+
+def test_preempted_speculation_leaves_no_prediction():
+    preempt = threading.Event()
+    preempt.set()  # The real update arrived before the move method started
+    speculator = Speculator(_make_move)
+    assert not speculator.speculate(_game_map(10), [], 0.5, preempt=preempt)
+    assert (_bot, _map, _general, _runs) == (None, None, None, 0)
+    assert speculator.preempted == 1 and not speculator.commit(object(), _game_map(11))
+
+
+def _play(turns, speculate):
+    """
+    Play bot_blob as player 0 of a SyntheticGame the way GeneralsBot does: each update the move is committed from
+    the speculation or computed, the game executes the first queued move, and the speculation runs on a clone
+    :return: (moves placed, Speculator or None)
+    """
+    random.seed(0)
+    game = SyntheticGame(20, 20, players=2, seed=4)
+    bot = ReplayBot()
+    speculator = Speculator(bot_blob.make_move, use_deadline=False) if speculate else None
+    game_map = None
+    for _ in range(turns):
+        data = game.frame()
+        game_map = Map(game.start_data(), data) if game_map is None else game_map
+        game_map.update(data)
+        bot.turn_started(game_map)
+        if speculator is None or not speculator.commit(bot, game_map):
+            bot.scheduler.run_routine("make_move", lambda: bot_blob.make_move(bot, game_map))
+        queued = bot.queued_moves
+        moves = [(move.source, move.dest, move.move_half) for move in queued[:1]]
+        if speculator is not None:
+            speculator.speculate(game_map.clone(), moves, 0.5, queued[1:], threading.Event())
+        game.step(moves)
+    return bot.moves, speculator
+
+
+def test_speculation_hits_and_keeps_moves():
+    moves, _ = _play(150, speculate=False)
+    speculated_moves, speculator = _play(150, speculate=True)
+    assert speculator.hits > 20
+    assert speculated_moves == moves
@@ -0,0 +1,74 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Targeting Tests: attack candidates, nearest_target_tile and the target buckets against the per-tile scans
+"""
+
+from base.client.constants import *
+from base.client.map import Map
+from tools.bench_targeting import scalar_nearest_target_tile
+from tools.synthetic_game import SyntheticGame
+
+
+def _maps(rows=24, cols=24, turns=250, seed=3):
+    game = SyntheticGame(rows, cols, players=4, seed=seed)
+    frames = game.frames(turns)
+    game_map = Map(game.start_data(), next(frames))
+    for data in frames:
+        yield game_map.update(data)
+
+
+def _scan_attack_candidates(game_map):
+    # Column-major, as nearest_target_tile used to scan the grid
+    return [game_map.grid[y][x].tile_id for x in range(game_map.cols) for y in range(game_map.rows)
+            if game_map.grid[y][x].is_valid_target() and game_map.grid[y][x].should_attack()]
+
+
+def test_attack_candidates_match_scan():
+    for game_map in _maps():
+        if game_map.turn % 50 == 0:
+            game_map.do_not_attack_players = [1]
+        elif game_map.turn % 50 == 1:
+            game_map.do_not_attack_players = []
+        assert game_map.attack_candidates() == _scan_attack_candidates(game_map), "turn %d" % game_map.turn
+
+
+def test_nearest_target_tile_matches_scan():
+    for game_map in _maps():
+        for source in [tile for tile in game_map.tiles[game_map.player_index] if tile.army > 1][:10]:
+            assert source.nearest_target_tile() == scalar_nearest_target_tile(source), "turn %d" % game_map.turn
+
+
+def test_nearest_target_tile_skips_pending_moves():
+    for game_map in _maps(turns=60):
+        pass
+    source = max(game_map.tiles[game_map.player_index], key=lambda tile: tile.army)
+    target = source.nearest_target_tile()
+    assert target is not None
+    game_map.pending_moves.add(1, source.tile_id, target.tile_id)
+    assert source.nearest_target_tile() != target
+    game_map.pending_moves.remove(1)
+    assert source.nearest_target_tile() == target
+
+
+def _scan_buckets(game_map):
+    buckets = {OPP_GENERAL: [], OPP_CITY: [], OPP_ARMY: [], OPP_EMPTY: []}
+    for tile in game_map.flat_grid:
+        if tile.tile == game_map.player_index or not tile.is_valid_target():
+            continue
+        if tile.tile >= 0 and tile.is_general:
+            buckets[OPP_GENERAL].append((tile.army, tile.tile_id))
+        if tile.is_city:
+            buckets[OPP_CITY].append((tile.army, tile.tile_id))
+        elif tile.tile >= 0:
+            buckets[OPP_ARMY].append((tile.army, tile.tile_id))
+        if tile.tile == TILE_EMPTY:
+            buckets[OPP_EMPTY].append((tile.army, tile.tile_id))
+    return {opp_type: sorted(bucket) for opp_type, bucket in buckets.items()}
+
+
+def test_target_buckets_match_scan():
+    for game_map in _maps():
+        expected = _scan_buckets(game_map)
+        for opp_type, bucket in expected.items():
+            entries = game_map.target_candidates._bucket(opp_type)
+            assert list(zip(entries.armies, entries.tile_ids)) == bucket, "turn %d" % game_map.turn
@@ -0,0 +1,61 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Tile Tests: step_toward_me against the search it replaced
+"""
+
+from collections import deque
+
+from base.client.map import Map
+from tools.synthetic_game import SyntheticGame
+
+
+def bfs_step_toward_me(source):
+    """
+    Tile.step_toward_me as it was before SearchKernel.strength_search, kept as the parity reference
+    """
+    largest_tile = source._map.find_largest_tile()
+    bfs_queue = deque([source])
+    processed = set()
+    go_next = {source: None}
+    opposing_strength = {source: source.army}
+
+    while bfs_queue:
+        current = bfs_queue.popleft()
+        if current == largest_tile:
+            return False, False
+        if current in processed:
+            continue
+        for neighbor in current.neighbors(True, True, True):
+            if neighbor not in processed:
+                if neighbor not in go_next:
+                    bfs_queue.append(neighbor)
+                if neighbor.is_on_team():
+                    next_opposing_strength = opposing_strength[current] - (neighbor.army + 1)
+                else:
+                    next_opposing_strength = opposing_strength[current] + (neighbor.army + 1) * 1.1
+                if neighbor.is_swamp:
+                    next_opposing_strength += 1
+                if neighbor not in opposing_strength or next_opposing_strength < opposing_strength[neighbor]:
+                    opposing_strength[neighbor] = next_opposing_strength
+                    go_next[neighbor] = current
+                if next_opposing_strength < 0 and neighbor.is_self():
+                    return neighbor, current
+        processed.add(current)
+
+    return False, False
+
+
+def test_step_toward_me_matches_bfs():
+    game = SyntheticGame(24, 24, players=4, seed=9)
+    frames = game.frames(250)
+    game_map = Map(game.start_data(), next(frames))
+    steps = 0
+    for data in frames:
+        game_map.update(data)
+        if game_map.turn % 5:
+            continue
+        for tile in game_map.flat_grid[::7]:
+            expected = bfs_step_toward_me(tile)
+            assert tile.step_toward_me() == expected, "turn %d, %s" % (game_map.turn, tile)
+            steps += expected[0] is not False
+    assert steps > 0
@@ -0,0 +1,66 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Frame Decoding Benchmark: frames.decode_frame against the prefix strip + json.loads it replaced
+    Usage: python -m tools.bench_frames [corpus]  (corpus: a game recording, or one raw server frame per line)
+"""
+
+import json
+import sys
+import time
+
+from base.client import frames
+from base.client.recorder import RECORDING_EXTENSION, read_recording
+from tools.synthetic_game import SyntheticGame
+
+MAP_SIZES = [(20, 20), (40, 40), (70, 70)]
+TURNS = 500
+REPEAT = 3
+
+
+def legacy_decode_frame(msg):
+    """
+    The decoding Generals.get_updates used before frames.decode_frame, kept as the reference
+    """
+    while msg and msg[0].isdigit():
+        msg = msg[1:]
+    return json.loads(msg)
+
+
+def synthetic_corpus(rows, cols, turns=TURNS):
+    game = SyntheticGame(rows, cols, players=4, seed=rows * cols)
+    corpus = ["43" + json.dumps(["game_start", game.start_data()])]
+    corpus.extend("42" + json.dumps(["game_update", data]) for data in game.frames(turns))
+    return corpus
+
+
+def frames_per_second(decode, corpus):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for frame in corpus:
+            decode(frame)
+    return REPEAT * len(corpus) / (time.perf_counter() - start)
+
+
+def bench_corpus(corpus):
+    for frame in corpus:
+        assert frames.decode_frame(frame)[1] == legacy_decode_frame(frame), "decoded frames differ"
+    return frames_per_second(legacy_decode_frame, corpus), frames_per_second(frames.decode_frame, corpus)
+
+
+def _print_row(name, corpus):
+    before, after = bench_corpus(corpus)
+    size = sum(len(frame) for frame in corpus) / len(corpus)
+    print("%-12s %10.0f %14.0f %14.0f %7.1fx" % (name, size, before, after, after / before))
+
+
+if __name__ == '__main__':
+    print("JSON backend: %s" % frames.JSON_BACKEND)
+    print("%-12s %10s %14s %14s %8s" % ("corpus", "avg bytes", "before (f/s)", "after (f/s)", "speedup"))
+    if len(sys.argv) > 1 and sys.argv[1].endswith(RECORDING_EXTENSION):
+        _print_row("recorded", list(read_recording(sys.argv[1])))
+    elif len(sys.argv) > 1:
+        with open(sys.argv[1]) as corpus_file:
+            _print_row("recorded", [line.rstrip("\n") for line in corpus_file if line.strip()])
+    else:
+        for rows, cols in MAP_SIZES:
+            _print_row("%dx%d" % (rows, cols), synthetic_corpus(rows, cols))
@@ -0,0 +1,36 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Memory Benchmark: Bytes allocated per Map (and per Tile) across map sizes
+    Usage: python -m tools.bench_memory
+"""
+
+import tracemalloc
+
+from base.client.map import Map
+from tools.synthetic_game import SyntheticGame
+
+MAP_SIZES = [(20, 20), (40, 40), (70, 70)]
+TURNS = 100
+
+
+def measure_map(rows, cols, turns=TURNS):
+    game = SyntheticGame(rows, cols, seed=rows * cols)
+    frames = list(game.frames(turns))
+    start_data = game.start_data()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    game_map = Map(start_data, frames[0])
+    for data in frames[1:]:
+        game_map.update(data)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    return sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+
+
+if __name__ == '__main__':
+    print("%-8s %12s %10s" % ("size", "bytes/map", "bytes/tile"))
+    for rows, cols in MAP_SIZES:
+        map_bytes = measure_map(rows, cols)
+        print("%-8s %12d %10.1f" % ("%dx%d" % (rows, cols), map_bytes, map_bytes / (rows * cols)))
@@ -0,0 +1,104 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Pathfinding Benchmark: Tile.path_to against the Queue based search it replaced
+    Usage: python -m tools.bench_pathfinding
+"""
+
+import random
+import time
+from queue import Queue
+
+from base.client.map import Map
+from tools.synthetic_game import SyntheticGame
+
+MAP_SIZES = [(20, 20), (40, 40), (70, 70)]
+TURNS = 200
+PAIRS = 20  # (source, dest) pairs searched every 5 turns
+
+
+def queue_path_to(source, dest, include_cities=False, include_obstacles=False):
+    """
+    Tile.path_to as it was before PathFinder, kept as the parity reference
+    """
+    if dest is None:
+        return []
+
+    frontier = Queue()
+    frontier.put(source)
+    came_from = {source: None}
+    army_count = {source: source.army}
+    processed = set()
+
+    while not frontier.empty():
+        current = frontier.get()
+
+        if current == dest:  # Found Destination
+            break
+
+        for next in current.neighbors(
+                include_swamps=True,
+                include_cities=include_cities,
+                include_obstacles=include_obstacles,
+        ):
+            if next not in processed and (next.is_on_team() or next == dest or next.army < army_count[current]):
+                if next not in came_from:
+                    frontier.put(next)
+                if next.is_on_team():
+                    next_army_count = army_count[current] + (next.army - 1)
+                else:
+                    next_army_count = army_count[current] - (next.army + 1)
+                if next not in army_count or next_army_count > army_count[next]:
+                    army_count[next] = next_army_count
+                    came_from[next] = current
+
+        processed.add(current)
+
+    if dest not in came_from:  # Did not find dest
+        if include_cities:
+            return []
+        else:
+            return queue_path_to(source, dest, include_cities=True)
+
+    path = [dest]
+    while came_from[path[-1]] is not None:
+        path.append(came_from[path[-1]])
+    path.reverse()
+    return path
+
+
+def bench_map(rows, cols, turns=TURNS):
+    game = SyntheticGame(rows, cols, seed=rows * cols)
+    frames = game.frames(turns)
+    game_map = Map(game.start_data(), next(frames))
+    rng = random.Random(rows * cols)
+
+    times = {"queue": 0, "path_to": 0}
+    calls = 0
+    for data in frames:
+        game_map.update(data)
+        if game_map.turn % 5:
+            continue
+        mine = game_map.tiles[game_map.player_index]
+        pairs = [(rng.choice(mine), rng.choice(game_map.flat_grid)) for _ in range(PAIRS)]
+        options = [(rng.random() < 0.5, rng.random() < 0.5) for _ in range(PAIRS)]
+
+        start = time.perf_counter()
+        expected = [queue_path_to(a, b, c, o) for (a, b), (c, o) in zip(pairs, options)]
+        times["queue"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = [a.path_to(b, c, o) for (a, b), (c, o) in zip(pairs, options)]
+        times["path_to"] += time.perf_counter() - start
+        assert found == expected, "path_to differs from the Queue search on turn %d" % game_map.turn
+
+        calls += PAIRS
+
+    return {name: total / calls for name, total in times.items()}
+
+
+if __name__ == '__main__':
+    print("%-8s %12s %12s %8s" % ("size", "queue (us)", "path_to (us)", "speedup"))
+    for rows, cols in MAP_SIZES:
+        result = bench_map(rows, cols)
+        print("%-8s %12.1f %12.1f %7.1fx" % ("%dx%d" % (rows, cols), result["queue"] * 1e6, result["path_to"] * 1e6,
+                                             result["queue"] / result["path_to"]))
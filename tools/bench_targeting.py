@@ -0,0 +1,143 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Targeting Benchmark: Tile.nearest_target_tile against the per-tile scan it replaced, and the mask pass of
+    Map.attack_candidates against a per-tile list comprehension
+    Usage: python -m tools.bench_targeting
+"""
+
+import time
+
+from base.client.constants import *
+from base.client.distances import UNREACHABLE
+from base.client.map import Map
+from tools.synthetic_game import SyntheticGame
+
+MAP_SIZES = [(20, 20), (40, 40), (70, 70)]
+TURNS = 250
+REPEAT = 5
+
+
+def scalar_nearest_target_tile(source):
+    """
+    The per-tile scan nearest_target_tile used before attack_candidates, kept as the parity reference
+    """
+    if not source.is_self():
+        return None
+
+    max_target_army = source.army * 4 + 14
+    distances = source._map.distances.field(source)
+
+    dest = None
+    dest_distance = 9999
+    for x in range(source._map.cols):  # Check Each Square
+        for y in range(source._map.rows):
+            tile = source._map.grid[y][x]
+            if not tile.is_valid_target() or not tile.should_attack() or tile.army > max_target_army:
+                continue
+
+            distance = distances[tile.tile_id]
+            if distance == UNREACHABLE:
+                continue
+            if tile.is_general:
+                distance = distance * 0.09
+            elif tile.is_city:
+                distance *= 0.3
+            if tile.army > source.army:
+                distance = distance * (1.6 * tile.army / source.army)
+            if tile.is_swamp:
+                distance = distance * 10 * 9999
+                if tile.turn_held > 0:
+                    distance = distance * 3
+
+            if distance < dest_distance:
+                dest = tile
+                dest_distance = distance
+    return dest
+
+
+def comprehension_attack_candidates(game_map):
+    """
+    attack_candidates as per-tile list comprehensions over tile_flags and tile_types, kept as a reference
+    """
+    flags = game_map.tile_flags
+    held = [i for i, f in enumerate(flags) if f & FLAG_HELD and not f & (FLAG_MOUNTAIN | FLAG_OBSTACLE)]
+    reachable = {neighbor for i in held for neighbor in game_map.adjacency[i]}
+    excluded = {TILE_MOUNTAIN, TILE_FOG, TILE_OBSTACLE}
+    excluded.update(game_map.my_team)
+    excluded.update(game_map.do_not_attack_players)
+    candidates = [i for i in reachable if game_map.tile_types[i] not in excluded]
+    candidates.sort(key=lambda i: (i % game_map.cols) * game_map.rows + i // game_map.cols)
+    return candidates
+
+
+def bench_candidates(rows, cols, turns=TURNS):
+    """
+    :return: (seconds per comprehension pass, seconds per mask pass)
+    """
+    game = SyntheticGame(rows, cols, seed=rows * cols)
+    frames = game.frames(turns)
+    game_map = Map(game.start_data(), next(frames))
+
+    comprehension_time = 0
+    mask_time = 0
+    for data in frames:
+        game_map.update(data)
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            expected = comprehension_attack_candidates(game_map)
+        comprehension_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            game_map._attack_candidates = ([], None)
+            found = game_map.attack_candidates()
+        mask_time += time.perf_counter() - start
+        assert found == expected, "attack_candidates differs from the comprehension on turn %d" % game_map.turn
+
+    return comprehension_time / (REPEAT * turns), mask_time / (REPEAT * turns)
+
+
+def bench_map(rows, cols, turns=TURNS):
+    game = SyntheticGame(rows, cols, seed=rows * cols)
+    frames = game.frames(turns)
+    game_map = Map(game.start_data(), next(frames))
+
+    scalar_time = 0
+    candidate_time = 0
+    calls = 0
+    for data in frames:
+        game_map.update(data)
+        sources = [tile for tile in game_map.tiles[game_map.player_index] if tile.army > 1][:10]
+        for source in sources:
+            source._map.distances.field(source)  # Don't time the shared distance field
+
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            expected = [scalar_nearest_target_tile(source) for source in sources]
+        scalar_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            found = []
+            for source in sources:
+                game_map._attack_candidates = ([], None)  # Time the whole-grid pass on every call
+                found.append(source.nearest_target_tile())
+        candidate_time += time.perf_counter() - start
+
+        assert found == expected, "nearest_target_tile differs from the scalar scan on turn %d" % game_map.turn
+        calls += REPEAT * len(sources)
+
+    return scalar_time / calls, candidate_time / calls
+
+
+if __name__ == '__main__':
+    print("%-8s %14s %14s %8s" % ("size", "scalar (us)", "current (us)", "speedup"))
+    for rows, cols in MAP_SIZES:
+        scalar, current = bench_map(rows, cols)
+        print("%-8s %14.1f %14.1f %7.1fx" % ("%dx%d" % (rows, cols), scalar * 1e6, current * 1e6, scalar / current))
+
+    print("\n%-8s %18s %14s %8s" % ("size", "comprehension (us)", "masks (us)", "speedup"))
+    for rows, cols in MAP_SIZES:
+        comprehension, masks = bench_candidates(rows, cols)
+        print("%-8s %18.1f %14.1f %7.1fx" % ("%dx%d" % (rows, cols), comprehension * 1e6, masks * 1e6,
+                                             comprehension / masks))
@@ -0,0 +1,192 @@
+"""
+    Generals.io Automated Client - https://github.com/harrischristiansen/generals-bot
+    Synthetic Game: Generates game_start/game_update frames for offline benchmarks
+"""
+
+import random
+
+from base.client.constants import *
+
+
+class SyntheticGame(object):
+    """
+    A small, deterministic stand-in for the game server. Players expand randomly and the frames seen by
+    player 0 (with fog of war) are encoded the same way the server encodes them.
+    """
+    def __init__(self, rows=20, cols=20, players=2, seed=0, mountain_density=0.2, city_density=0.04,
+                 swamp_density=0.04):
+        self._random = random.Random(seed)
+        self.rows = rows
+        self.cols = cols
+        self.players = players
+        self.turn = 1
+
+        size = rows * cols
+        self._owner = [TILE_EMPTY] * size
+        self._army = [0] * size
+        self._is_mountain = [False] * size
+        self._is_city = [False] * size
+        self._is_swamp = [False] * size
+        for i in range(size):
+            r = self._random.random()
+            if r < mountain_density:
+                self._is_mountain[i] = True
+                self._owner[i] = TILE_MOUNTAIN
+            elif r < mountain_density + city_density:
+                self._is_city[i] = True
+                self._army[i] = self._random.randint(38, 48)
+            elif r < mountain_density + city_density + swamp_density:
+                self._is_swamp[i] = True
+
+        open_tiles = [i for i in range(size)
+                      if not self._is_mountain[i] and not self._is_city[i] and not self._is_swamp[i]]
+        self._generals = self._random.sample(open_tiles, players)
+        for player, general in enumerate(self._generals):
+            self._owner[general] = player
+            self._army[general] = 1
+
+        self._seen_cities = []
+        self._last_map = []
+        self._last_cities = []
+
+    # ======================== Frames ======================== #
+
+    def start_data(self):
+        return {
+            'playerIndex': 0,
+            'usernames': ["player_%d" % player for player in range(self.players)],
+            'teams': list(range(self.players)),
+            'replay_id': "synthetic",
+            'chat_room': "game_synthetic",
+            'swamps': [i for i in range(self.rows * self.cols) if self._is_swamp[i]],
+        }
+
+    def frames(self, turns):
+        yield self.frame()
+        for _ in range(turns):
+            self.step()
+            yield self.frame()
+
+    def frame(self):
+        visible = self._visible()
+        armies = []
+        terrain = []
+        for i in range(self.rows * self.cols):
+            if visible[i]:
+                armies.append(self._army[i])
+                terrain.append(self._owner[i])
+                if self._is_city[i] and i not in self._seen_cities:
+                    self._seen_cities.append(i)
+            else:
+                armies.append(0)
+                terrain.append(TILE_OBSTACLE if self._is_mountain[i] or self._is_city[i] else TILE_FOG)
+
+        board = [self.cols, self.rows] + armies + terrain
+        data = {
+            'turn': self.turn,
+            'map_diff': encode_diff(self._last_map, board),
+            'cities_diff': encode_diff(self._last_cities, self._seen_cities),
+            'generals': [general if visible[general] else -1 for general in self._generals],
+            'scores': [{
+                'i': player,
+                'total': sum(army for army, owner in zip(self._army, self._owner) if owner == player),
+                'tiles': self._owner.count(player),
+                'dead': False,
+            } for player in range(self.players)],
+        }
+        self._last_map = board
+        self._last_cities = list(self._seen_cities)
+        return data
+
+    # ======================== Simulation ======================== #
+
+    def step(self, moves=None):
+        """
+        :param moves: List of (source, dest, move_half) queued by player 0, replacing its random moves: like the
+            server, the first one is executed this turn. None for random moves
+        """
+        self.turn += 1
+        size = self.rows * self.cols
+        for player in range(self.players):
+            if player == 0 and moves is not None:
+                for source, dest, move_half in moves[:1]:
+                    if self._owner[source] == player and self._army[source] > 1 and not self._is_mountain[dest]:
+                        self._attack(player, source, dest, move_half)
+                continue
+            sources = [i for i in range(size) if self._owner[i] == player and self._army[i] > 1]
+            if not sources:
+                continue
+            for _ in range(2):
+                source = self._random.choice(sources)
+                dests = [i for i in self._neighbors(source) if not self._is_mountain[i]]
+                if not dests or self._army[source] < 2:
+                    continue
+                self._attack(player, source, self._random.choice(dests))
+
+        for i in range(size):
+            if self._owner[i] < 0:
+                continue
+            if (self._is_city[i] or i in self._generals) and self.turn % 2 == 0:
+                self._army[i] += 1
+            elif self.turn % 50 == 0:
+                self._army[i] += 1
+            if self._is_swamp[i] and self.turn % 2 == 0:
+                self._army[i] -= 1
+                if self._army[i] <= 0:
+                    self._army[i] = 0
+                    self._owner[i] = TILE_EMPTY
+
+    def _attack(self, player, source, dest, move_half=False):
+        moving = self._army[source] // 2 if move_half else self._army[source] - 1
+        self._army[source] -= moving
+        if self._owner[dest] == player:
+            self._army[dest] += moving
+        elif moving > self._army[dest]:
+            self._army[dest] = moving - self._army[dest]
+            self._owner[dest] = player
+        else:
+            self._army[dest] -= moving
+
+    def _neighbors(self, i):
+        y, x = divmod(i, self.cols)
+        for dy, dx in DIRECTIONS:
+            if 0 <= y + dy < self.rows and 0 <= x + dx < self.cols:
+                yield (y + dy) * self.cols + x + dx
+
+    def _visible(self):
+        visible = [False] * (self.rows * self.cols)
+        for i, owner in enumerate(self._owner):
+            if owner != 0:
+                continue
+            y, x = divmod(i, self.cols)
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    if 0 <= y + dy < self.rows and 0 <= x + dx < self.cols:
+                        visible[(y + dy) * self.cols + x + dx] = True
+        return visible
+
+
+# ======================== Helpers ======================== #
+
+def encode_diff(old, new):
+    """
+    Inverse of map._apply_diff: encode the change from old to new in the generals.io diff format
+    """
+    diff = []
+    unchanged = 0
+    i = 0
+    while i < len(new):
+        if i < len(old) and old[i] == new[i]:
+            unchanged += 1
+            i += 1
+            continue
+        start = i
+        while i < len(new) and not (i < len(old) and old[i] == new[i]):
+            i += 1
+        diff.append(unchanged)
+        diff.append(i - start)
+        diff.extend(new[start:i])
+        unchanged = 0
+    if unchanged:
+        diff.append(unchanged)
+    return diff